@@ -0,0 +1,325 @@
+# aggregations.py
+
+"""
+Camada de agregação do dashboard.
+
+Todas as séries exibidas nos gráficos são calculadas uma única vez para a
+"Visão Regional" (no carregamento) e para cada município (na primeira vez
+em que é consultado). O resultado é um mapeamento indexado pelo nome da
+visão, então trocar a seleção no app é apenas uma consulta.
+
+Cada tabela é indexada por município no carregamento (posições das linhas
+de cada município, obtidas com um único groupby), então a visão de um
+município lê só as próprias linhas: o custo de uma seleção não cresce com
+o tamanho das tabelas nem com o número de municípios.
+
+Para adicionar um gráfico novo, registre a agregação correspondente:
+
+    @register_aggregation('minha_serie')
+    def _minha_serie(dados, regional):
+        df = dados['empresas']
+        return df.groupby(PORTE_EMPRESA_COL, as_index=False, observed=True)[EMPRESAS_QTD_COL].sum() if regional else df
+
+A função recebe o dicionário de abas já restrito à visão (a tabela completa
+na visão regional, a partição do município caso contrário) e nunca precisa
+filtrar as tabelas inteiras.
+
+Os indicadores do modo de comparação (KPIs, IDEB e empregos por setor) são
+calculados para todos os municípios de uma vez, com um groupby por tabela
+(ver comparison_table); os cartões de KPI de cada visão usam as mesmas
+funções.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from config import *
+
+# Nome da agregação -> (função, fábrica do valor vazio)
+AGGREGATIONS = {}
+
+# Coluna de município usada para particionar cada tabela
+PARTITION_COLUMNS = {
+    'cidades': CIDADES_MUNICIPIO_COL,
+    'geo_dados': MUNICIPIO_COL,
+    'empregos_setor': MUNICIPIO_COL,
+    'empregos_faixa_etaria': MUNICIPIO_COL,
+    'empresas': MUNICIPIO_COL,
+    'instituicoes_ensino': MUNICIPIO_COL,
+    'ideb': MUNICIPIO_COL,
+    'instituicoes': MUNICIPIO_COL,
+}
+
+# Subcategorias contadas nos cartões de empreendedorismo
+SUBCATEGORIAS_CARDS = ['Aceleradora', 'Coworking', 'Incubadora']
+
+
+def register_aggregation(nome, vazio=pd.DataFrame):
+    """
+    Registra uma agregação calculada para todas as visões no carregamento.
+
+    `vazio` é a fábrica do valor usado quando a tabela de origem não tem as
+    colunas esperadas, para que o app mostre o aviso de "sem dados" em vez de
+    falhar.
+    """
+    def decorator(func):
+        AGGREGATIONS[nome] = (func, vazio)
+        return func
+    return decorator
+
+
+# --- Agregações dos gráficos do app ---
+
+def _contagem(df, coluna, nome_contagem):
+    return df.groupby(coluna, as_index=False, observed=True).size().rename(columns={'size': nome_contagem})
+
+
+@register_aggregation('cidades')
+def _cidades(dados, regional):
+    return dados['cidades']
+
+
+@register_aggregation('kpis', vazio=dict)
+def _kpis(dados, regional):
+    """Indicadores dos cartões de KPI (ver charts.KPI_CARDS); vazio se não houver dados."""
+    df = dados['cidades']
+    if df.empty:
+        return {}
+    # Mesmas fórmulas de kpi_table, com a visão inteira como um grupo só
+    medias = {coluna: df[coluna].mean() for coluna in _KPI_MEDIAS}
+    somas = {coluna: df[coluna].sum() for coluna in _KPI_SOMAS}
+    return {chave: float(valor) for chave, valor in _calcular_kpis(medias, somas).items()}
+
+
+@register_aggregation('geo')
+def _geo(dados, regional):
+    df = dados['geo_dados']
+    return df.groupby(ZONA_COL, as_index=False, observed=True)[PERCENTUAL_COL].mean() if regional else df[[ZONA_COL, PERCENTUAL_COL]]
+
+
+@register_aggregation('empregos_setor')
+def _empregos_setor(dados, regional):
+    df = dados['empregos_setor']
+    return df.groupby(SETOR_COL, as_index=False, observed=True)[EMPREGADOS_SETOR_VAL_COL].sum() if regional else df[[SETOR_COL, EMPREGADOS_SETOR_VAL_COL]]
+
+
+@register_aggregation('empregos_faixa')
+def _empregos_faixa(dados, regional):
+    df = dados['empregos_faixa_etaria']
+    return df.groupby(FAIXA_ETARIA_COL, as_index=False, observed=True)[EMPREGADOS_FAIXA_ETARIA_VAL_COL].sum() if regional else df[[FAIXA_ETARIA_COL, EMPREGADOS_FAIXA_ETARIA_VAL_COL]]
+
+
+@register_aggregation('empresas')
+def _empresas(dados, regional):
+    df = dados['empresas']
+    return df.groupby(PORTE_EMPRESA_COL, as_index=False, observed=True)[EMPRESAS_QTD_COL].sum() if regional else df[[PORTE_EMPRESA_COL, EMPRESAS_QTD_COL]]
+
+
+@register_aggregation('inst_ensino_rede')
+def _inst_ensino_rede(dados, regional):
+    return _contagem(dados['instituicoes_ensino'], REDE_ENSINO_COL, INST_ENSINO_QTD_COL)
+
+
+@register_aggregation('inst_ensino_nivel')
+def _inst_ensino_nivel(dados, regional):
+    return _contagem(dados['instituicoes_ensino'], NIVEL_ENSINO_COL, INST_ENSINO_QTD_COL)
+
+
+@register_aggregation('ideb')
+def _ideb(dados, regional):
+    df = dados['ideb']
+    return df.groupby(ETAPA_ENSINO_COL, as_index=False, observed=True)[IDEB_VAL_COL].mean() if regional else df[[ETAPA_ENSINO_COL, IDEB_VAL_COL]]
+
+
+@register_aggregation('instituicoes')
+def _instituicoes(dados, regional):
+    return _contagem(dados['instituicoes'], CATEGORIA_INST_COL, INST_CATEGORIA_QTD_COL)
+
+
+@register_aggregation('inst_cards', vazio=lambda: dict.fromkeys(SUBCATEGORIAS_CARDS, 0))
+def _inst_cards(dados, regional):
+    contagem = dados['instituicoes'][SUBCATEGORIA_INST_COL].value_counts()
+    return {sub: int(contagem.get(sub, 0)) for sub in SUBCATEGORIAS_CARDS}
+
+
+# --- Indicadores de todos os municípios de uma vez ---
+# Cada função recebe a tabela inteira e calcula o indicador de todos os
+# grupos com um único groupby (sobre os códigos da coluna categórica de
+# município), devolvendo um DataFrame com uma linha por grupo. `por` é a
+# coluna que define os grupos.
+
+# Chaves dos cartões de KPI, na ordem de charts.KPI_CARDS
+KPI_COLUMNS = [
+    'idh_medio', 'pib_per_capita', 'pop_estimada', 'habitantes',
+    'pop_idade_ativa', 'perc_pop_ativa', 'perc_pop_ocupada', 'renda_per_capita_sm',
+]
+# Colunas do cidades.csv consolidadas pela média e pela soma nos KPIs
+_KPI_MEDIAS = [IDH_COL, PIB_PER_CAPITA_COL, POP_OCUPADA_COL, RENDA_PER_CAPITA_SM_COL]
+_KPI_SOMAS = [POP_ESTIMADA_COL, HABITANTES_COL, POP_ATIVA_COL]
+
+
+def _calcular_kpis(medias, somas):
+    """
+    {chave do KPI: valor} a partir das médias e somas das colunas do
+    cidades.csv, de uma visão (números) ou de cada grupo (Series).
+    """
+    habitantes, pop_idade_ativa = somas[HABITANTES_COL], somas[POP_ATIVA_COL]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        perc_pop_ativa = np.where(habitantes > 0, pop_idade_ativa / habitantes * 100, 0.0)
+    return {
+        'idh_medio': medias[IDH_COL],
+        'pib_per_capita': medias[PIB_PER_CAPITA_COL],
+        'pop_estimada': somas[POP_ESTIMADA_COL],
+        'habitantes': habitantes,
+        'pop_idade_ativa': pop_idade_ativa,
+        'perc_pop_ativa': perc_pop_ativa,
+        'perc_pop_ocupada': medias[POP_OCUPADA_COL],
+        'renda_per_capita_sm': medias[RENDA_PER_CAPITA_SM_COL],
+    }
+
+
+def kpi_table(cidades, por=CIDADES_MUNICIPIO_COL):
+    """Indicadores dos cartões de KPI (colunas KPI_COLUMNS) de cada grupo do cidades.csv."""
+    grupos = cidades.groupby(por, observed=True)
+    kpis = _calcular_kpis(grupos[_KPI_MEDIAS].mean(), grupos[_KPI_SOMAS].sum())
+    return pd.DataFrame(kpis, columns=KPI_COLUMNS).astype(np.float64)
+
+
+def ideb_table(ideb, por=MUNICIPIO_COL):
+    """IDEB médio de cada grupo ('ideb_medio', média de todas as notas) e de cada etapa ('ideb:<etapa>')."""
+    grupos = ideb.groupby([por, ETAPA_ENSINO_COL], observed=True)[IDEB_VAL_COL].agg(['sum', 'count'])
+    soma, contagem = grupos['sum'].unstack().rename_axis(columns=None), grupos['count'].unstack()
+    tabela = (soma / contagem).add_prefix('ideb:')
+    tabela.insert(0, 'ideb_medio', soma.sum(axis=1) / contagem.sum(axis=1))
+    return tabela
+
+
+def employment_table(empregos_setor, por=MUNICIPIO_COL):
+    """Total de empregados de cada grupo ('empregos_total') e de cada setor ('empregos:<setor>')."""
+    tabela = (
+        empregos_setor.groupby([por, SETOR_COL], observed=True)[EMPREGADOS_SETOR_VAL_COL]
+        .sum().unstack(fill_value=0).rename_axis(columns=None).add_prefix('empregos:')
+    )
+    tabela.insert(0, 'empregos_total', tabela.sum(axis=1))
+    return tabela
+
+
+# Tabela de origem -> indicadores em lote do modo de comparação
+COMPARISON_TABLES = {
+    'cidades': kpi_table,
+    'ideb': ideb_table,
+    'empregos_setor': employment_table,
+}
+
+
+def comparison_table(data_sheets, municipios=None):
+    """
+    Indicadores de comparação de todos os municípios: uma linha por
+    município (os do cidades.csv, ou `municipios`) e as colunas de
+    COMPARISON_TABLES lado a lado, NaN onde a tabela não tem o município.
+
+    Tabelas sem as colunas esperadas ficam de fora, como as agregações com
+    valor vazio.
+    """
+    if municipios is None:
+        municipios = sorted(data_sheets['cidades'][CIDADES_MUNICIPIO_COL].unique())
+    indice = pd.Index(municipios, name=CIDADES_MUNICIPIO_COL)
+    partes = []
+    for chave, func in COMPARISON_TABLES.items():
+        try:
+            partes.append(func(data_sheets[chave]).reindex(indice))
+        except KeyError:
+            continue
+    return pd.concat(partes, axis=1) if partes else pd.DataFrame(index=indice)
+
+
+def rankings(tabela):
+    """Posição de cada linha em cada coluna (1 = maior valor; empates dividem a melhor posição)."""
+    return tabela.rank(ascending=False, method='min').astype('Int64')
+
+
+# --- Construção do cubo ---
+
+def _indexar(df, coluna):
+    """
+    Posições das linhas de cada município na tabela, com um único groupby
+    (sobre os códigos inteiros da coluna categórica, ver compact_dtypes.py).
+    """
+    if coluna not in df.columns:
+        return {}
+    return df.groupby(coluna, sort=False, observed=True).indices
+
+
+def _agregar_visao(dados, regional):
+    visao = {}
+    for nome, (func, vazio) in AGGREGATIONS.items():
+        try:
+            visao[nome] = func(dados, regional)
+        except KeyError:
+            visao[nome] = vazio()
+    return visao
+
+
+class AggregationCube(Mapping):
+    """
+    {visão: {agregação: resultado}}, com a chave REGIONAL_VIEW para o
+    consolidado e o nome de cada município do cidades.csv para as demais.
+
+    A visão regional é calculada na construção; a de um município, na
+    primeira consulta, a partir das linhas indexadas do município, e fica
+    guardada para as próximas. Os resultados são compartilhados entre
+    sessões e não devem ser alterados.
+
+    `comparacao` tem os indicadores de todos os municípios lado a lado
+    (comparison_table), calculados em lote na primeira consulta.
+    `materialize()` calcula tudo de uma vez (ver shared_store.py).
+    """
+
+    def __init__(self, data_sheets):
+        self.municipios = sorted(data_sheets['cidades'][CIDADES_MUNICIPIO_COL].unique())
+        self._tabelas = {k: v for k, v in data_sheets.items() if k in PARTITION_COLUMNS}
+        self._indices = {chave: _indexar(df, PARTITION_COLUMNS[chave]) for chave, df in self._tabelas.items()}
+        self._nomes = set(self.municipios)
+        self._visoes = {REGIONAL_VIEW: _agregar_visao(self._tabelas, regional=True)}
+        self._comparacao = None
+
+    def __getitem__(self, visao):
+        resultado = self._visoes.get(visao)
+        if resultado is None:
+            if visao not in self._nomes:
+                raise KeyError(visao)
+            sem_linhas = np.array([], dtype=np.intp)
+            dados = {
+                chave: df.take(self._indices[chave].get(visao, sem_linhas))
+                for chave, df in self._tabelas.items()
+            }
+            # Duas sessões podem calcular a mesma visão ao mesmo tempo; o resultado é idêntico
+            resultado = self._visoes[visao] = _agregar_visao(dados, regional=False)
+        return resultado
+
+    @property
+    def comparacao(self):
+        if self._comparacao is None:
+            self._comparacao = comparison_table(self._tabelas, self.municipios)
+        return self._comparacao
+
+    def materialize(self):
+        """Calcula todas as visões e a tabela de comparação agora; retorna o próprio cubo."""
+        for visao in self:
+            self[visao]
+        self.comparacao
+        return self
+
+    def __iter__(self):
+        yield REGIONAL_VIEW
+        yield from self.municipios
+
+    def __len__(self):
+        return len(self.municipios) + 1
+
+
+def build_cube(data_sheets):
+    """Indexa as tabelas por município e calcula a visão regional (ver AggregationCube)."""
+    return AggregationCube(data_sheets)
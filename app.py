@@ -1,177 +1,202 @@
 # app.py
 
+import functools
+import time
+from datetime import datetime
+from uuid import uuid4
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import json
 # Importa todas as configurações do arquivo config.py
-from config import * # --- Configuração da Página do Streamlit ---
+from config import *
+from charts import (
+    CHARTS,
+    INDICADOR_CARDS,
+    KPI_CARDS,
+    build_comparison_figure,
+    build_map_figure,
+    comparison_column,
+    comparison_display,
+    indicador_card_html,
+    kpi_card_html,
+    region_title,
+    zonas_urbana_rural,
+)
+from aggregations import rankings
+from compact_dtypes import memory_report
+from data_snapshot import parse_report
+from data_watcher import DataVersion
+from figure_cache import FigureCache
+from instrumentation import Instrumentation
+from regions import RegionRegistry
+from shared_store import attach, ensure_published, shared_mode_enabled
+
+# --- Configuração da Página do Streamlit ---
 st.set_page_config(page_title="Resumo Caparaó", layout="wide")
+inicio_execucao = time.perf_counter()
 
-# --- Função de Carregamento de Dados ---
-# @st.cache_data garante que os dados sejam carregados apenas uma vez (lazy loading)
-@st.cache_data
-def load_all_data():
-    """
-    Carrega dados do cidades.csv e das diferentes abas do arquivo 
-    base_de_dados.xlsx, tratando erros comuns.
-    """
-    try:
-        # 1. Carrega o arquivo CSV principal
-        df_cidades = pd.read_csv(CIDADES_FILE, sep=",", decimal=",")
-        
-        # 2. Limpa e converte as colunas de dados demográficos e financeiros
-        df_cidades[HABITANTES_COL] = df_cidades[HABITANTES_COL].astype(str).str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
-        df_cidades[POP_ATIVA_COL] = df_cidades[POP_ATIVA_COL].astype(str).str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
-        df_cidades[POP_ESTIMADA_COL] = df_cidades[POP_ESTIMADA_COL].astype(str).str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
-        df_cidades[IDH_COL] = df_cidades[IDH_COL].astype(float)
-        df_cidades[POP_OCUPADA_COL] = df_cidades[POP_OCUPADA_COL].str.replace(",", ".").str.replace("%", "").astype(float)
-        df_cidades[RENDA_PER_CAPITA_SM_COL] = df_cidades[RENDA_PER_CAPITA_SM_COL].astype(str).str.replace(",", ".").astype(float)
-        df_cidades[PIB_PER_CAPITA_COL] = (
-            df_cidades[PIB_PER_CAPITA_COL]
-            .str.replace("R\$", "", regex=True)
-            .str.replace(" ", "")
-            .str.replace(".", "", regex=False)
-            .str.replace(",", ".", regex=False)
-            .astype(float)
-        )
+# --- Instrumentação de Latência ---
+# Um agregador por processo, compartilhado entre as sessões (ver instrumentation.py)
+@st.cache_resource
+def get_instrumentation():
+    return Instrumentation()
+
+def id_sessao():
+    return st.session_state.setdefault('_perfil_sessao', uuid4().hex[:8])
+
+def etapa(nome):
+    """Cronometra o bloco `with` como a etapa `nome` desta sessão."""
+    return get_instrumentation().etapa(nome, sessao=id_sessao())
+
+def medido(nome):
+    """Decorator que registra o tempo total da função como a etapa `nome`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with etapa(nome):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
 
-        # 3. Carrega dados das ABAS do arquivo Excel usando os nomes definidos no config.py
-        data_sheets = {
-            'cidades': df_cidades,
-            'geo_dados': pd.read_excel(BASE_DE_DADOS_XLSX_FILE, sheet_name=SHEET_GEO),
-            'empregos_setor': pd.read_excel(BASE_DE_DADOS_XLSX_FILE, sheet_name=SHEET_EMPREGOS_SETOR),
-            'empregos_faixa_etaria': pd.read_excel(BASE_DE_DADOS_XLSX_FILE, sheet_name=SHEET_EMPREGOS_FAIXA),
-            'empresas': pd.read_excel(BASE_DE_DADOS_XLSX_FILE, sheet_name=SHEET_EMPRESAS),
-            'instituicoes_ensino': pd.read_excel(BASE_DE_DADOS_XLSX_FILE, sheet_name=SHEET_INST_ENSINO),
-            'ideb': pd.read_excel(BASE_DE_DADOS_XLSX_FILE, sheet_name=SHEET_IDEB),
-            'instituicoes': pd.read_excel(BASE_DE_DADOS_XLSX_FILE, sheet_name=SHEET_INSTITUICOES),
-        }
-
-        # 4. Carrega o arquivo GeoJSON para o mapa
-        with open(GEOJSON_FILE, "r", encoding="utf-8") as f:
-            geojson_data = json.load(f)
-        data_sheets['geojson'] = geojson_data
-
-        return data_sheets
-
-    # 5. Tratamento de erros para ajudar a depurar problemas comuns
-    except FileNotFoundError as e:
+# --- Tratamento de Erros de Carregamento ---
+def exibir_erro_carregamento(e):
+    """Mostra mensagens de erro que ajudam a depurar problemas comuns nos arquivos de dados."""
+    if isinstance(e, FileNotFoundError):
         st.error(f"ERRO: Arquivo não encontrado - {e.filename}. Verifique se todos os 3 arquivos (cidades.csv, base_de_dados.xlsx, municipios_caparao.geojson) estão na pasta principal do seu projeto no GitHub.")
-        return None
-    except ValueError as e:
+    elif isinstance(e, ValueError):
         st.error(f"ERRO: Verifique se os nomes das abas no arquivo 'config.py' correspondem EXATAMENTE aos nomes das abas no seu arquivo 'base_de_dados.xlsx'. Detalhe: {e}")
-        return None
-    except Exception as e:
+    else:
         st.error(f"Ocorreu um erro inesperado ao carregar os dados: {e}")
+
+# --- Carregamento dos Dados ---
+# @st.cache_resource mantém um único registro de regiões por processo, compartilhado entre as
+# sessões. Cada região é carregada na primeira vez em que é selecionada e descartada quando as
+# regiões em memória passam do orçamento (ver regions.py). A thread do DataStore de cada região
+# recarrega em segundo plano só a fonte que mudou e troca a versão de uma vez (ver data_watcher.py)
+@st.cache_resource
+def get_regions():
+    return RegionRegistry()
+
+# --- Modo Compartilhado entre Réplicas ---
+# Com DASHBOARD_SHARED_STORE=1, dados e cubo vêm de um arquivo em memória compartilhada
+# mapeado somente leitura (ver shared_store.py); o processo guarda apenas o mapeamento
+@st.cache_resource(max_entries=2)
+def attach_shared_store(versao):
+    return DataVersion(**attach(versao))
+
+def carregar_dados(regiao):
+    """Retorna a versão atual dos dados da região (DataVersion), ou None se o carregamento falhar."""
+    try:
+        with etapa("carregar_dados"):
+            if shared_mode_enabled():
+                return attach_shared_store(ensure_published(regiao=regiao))
+            return get_regions().current(regiao)
+    except Exception as e:
+        exibir_erro_carregamento(e)
         return None
 
-# --- Início do Layout do Aplicativo ---
+# --- Cache de Figuras ---
+# Uma instância por processo, compartilhada entre as sessões (ver figure_cache.py)
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
 
-# Carrega todos os dados usando a função acima
-all_data = load_all_data()
+def figura(chart_id, selecao, visao, versao):
+    """CachedFigure do gráfico `chart_id` para a seleção (None sem dados), construída só na primeira vez."""
+    with etapa(f"figura:{chart_id}"):
+        return get_figure_cache().get(chart_id, selecao, versao, CHARTS[chart_id], visao)
 
-# Só executa o resto do aplicativo se os dados foram carregados com sucesso
-if all_data:
-    
-    # --- Título Principal ---
-    st.markdown("<h1 style='text-align:center; color: #0dcaf0;'>Dashboard Gênesis Caparaó</h1>", unsafe_allow_html=True)
+def perfil_ativo():
+    return st.query_params.get("perfil") == "1"
 
-    # --- Mapa Interativo e Filtro ---
+def exibir_figura(chart_id, entrada):
+    """st.plotly_chart medido; com o painel de perfil aberto, registra também o tamanho do JSON da figura."""
+    # A serialização extra só acontece nas sessões com ?perfil=1, fora do tempo medido
+    # Bytes em UTF-8: o Plotly serializa com orjson, que mantém os rótulos acentuados sem escape
+    tamanho = len(entrada.figure.to_json().encode()) if perfil_ativo() else None
+    with etapa(f"plotly_chart:{chart_id}") as medida:
+        st.plotly_chart(entrada.figure, width="stretch")
+        if tamanho is not None:
+            medida['bytes'] = tamanho
+
+# --- Componentes de Exibição ---
+# Função para criar os cartões de KPI (HTML compartilhado com a exportação estática, ver charts.py)
+def kpi_card(title, value, emoji, color="#000"):
+    st.markdown(kpi_card_html(title, value, emoji, color), unsafe_allow_html=True)
+
+def indicador_card(label, valor):
+    st.markdown(indicador_card_html(label, valor), unsafe_allow_html=True)
+
+def grafico(chart_id, selecao, carga, aviso):
+    """Exibe o gráfico da seleção (a partir do cache de figuras) ou o aviso de falta de dados."""
+    entrada = figura(chart_id, selecao, carga.cubo[selecao], carga.versao)
+    if entrada is not None:
+        exibir_figura(chart_id, entrada)
+    else:
+        st.warning(aviso)
+
+def secao_sob_demanda(titulo, chave):
+    """
+    Título da seção e um expander que só executa o conteúdo quando aberto.
+
+    Retorna o expander, ou None se estiver fechado (nada da seção é calculado).
+    """
+    st.markdown(f"<h2 style='text-align:center;'>{titulo}</h2>", unsafe_allow_html=True)
+    secao = st.expander("Exibir gráficos", key=f"secao_{chave}", on_change="rerun")
+    return secao if secao.open else None
+
+# --- Fragmentos da Página ---
+# Cada seção é um @st.fragment: interações dentro dela reexecutam só a própria seção.
+# A seleção de município fica no painel municipal, então trocá-la não reexecuta o mapa,
+# e as seções abaixo da dobra só são calculadas quando o usuário abre o expander.
+
+@st.fragment
+@medido("secao:mapa")
+def secao_mapa(regiao):
+    carga = carregar_dados(regiao)
+    if carga is None:
+        return
     st.markdown("<h2 style='text-align:center;'>Mapa Interativo e Filtro Municipal</h2>", unsafe_allow_html=True)
+    # O mapa não depende da seleção: é construído uma única vez por versão dos dados
+    with etapa("figura:mapa"):
+        entrada_mapa = get_figure_cache().get(
+            'mapa', None, carga.versao, build_map_figure, carga.dados['cidades'], carga.dados['geojson']
+        )
+    exibir_figura('mapa', entrada_mapa)
 
-    fig_mapa = px.choropleth_mapbox(
-        all_data['cidades'],
-        geojson=all_data['geojson'],
-        locations="MUNICIPIO",
-        featureidkey="properties.NM_MUN",
-        color=IDH_COL,
-        color_continuous_scale="Viridis",
-        mapbox_style="carto-positron",
-        center={"lat": -20.45, "lon": -41.5},
-        zoom=8,
-        opacity=0.6,
-        hover_data={"MUNICIPIO": True, IDH_COL: True, PIB_PER_CAPITA_COL: ':.2f'}
-    )
-    fig_mapa.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
-    st.plotly_chart(fig_mapa, use_container_width=True)
+@st.fragment
+@medido("painel_municipal")
+def painel_municipal(regiao):
+    carga = carregar_dados(regiao)
+    if carga is None:
+        return
 
     # Caixa de seleção para escolher um município ou a visão regional
-    municipios_options = ["Visão Regional"] + sorted(all_data['cidades']["MUNICIPIO"].unique())
     municipio_escolhido = st.selectbox(
         "Selecione o município para filtrar os dados ou escolha 'Visão Regional' para ver o consolidado:",
-        options=municipios_options
+        options=list(carga.cubo)
     )
 
-    # --- Lógica de Filtragem dos Dados ---
-    # Define se a visão é regional ou de um município específico
-    is_regional_view = (municipio_escolhido == "Visão Regional")
-    
-    if is_regional_view:
-        # Para a visão regional, os dados são agregados (somados ou calculada a média)
-        df_cidades_filtrado = all_data['cidades']
-        df_geo = all_data['geo_dados'].groupby(ZONA_COL, as_index=False)[PERCENTUAL_COL].mean()
-        df_empregos_setor = all_data['empregos_setor'].groupby(SETOR_COL, as_index=False)[EMPREGADOS_SETOR_VAL_COL].sum()
-        df_empregos_faixa = all_data['empregos_faixa_etaria'].groupby(FAIXA_ETARIA_COL, as_index=False)[EMPREGADOS_FAIXA_ETARIA_VAL_COL].sum()
-        df_empresas = all_data['empresas'].groupby(PORTE_EMPRESA_COL, as_index=False)[EMPRESAS_QTD_COL].sum()
-        df_inst_ensino_rede = all_data['instituicoes_ensino'].groupby(REDE_ENSINO_COL, as_index=False).size().rename(columns={'size': INST_ENSINO_QTD_COL})
-        df_inst_ensino_nivel = all_data['instituicoes_ensino'].groupby(NIVEL_ENSINO_COL, as_index=False).size().rename(columns={'size': INST_ENSINO_QTD_COL})
-        df_ideb = all_data['ideb'].groupby(ETAPA_ENSINO_COL, as_index=False)[IDEB_VAL_COL].mean()
-        df_instituicoes = all_data['instituicoes'].groupby(CATEGORIA_INST_COL, as_index=False).size().rename(columns={'size': INST_CATEGORIA_QTD_COL})
-        df_inst_cards = all_data['instituicoes']
-    else:
-        # Para a visão municipal, os dados são filtrados pelo nome do município
-        df_cidades_filtrado = all_data['cidades'][all_data['cidades'][MUNICIPIO_COL] == municipio_escolhido]
-        df_geo = all_data['geo_dados'][all_data['geo_dados'][MUNICIPIO_COL] == municipio_escolhido]
-        df_empregos_setor = all_data['empregos_setor'][all_data['empregos_setor'][MUNICIPIO_COL] == municipio_escolhido]
-        df_empregos_faixa = all_data['empregos_faixa_etaria'][all_data['empregos_faixa_etaria'][MUNICIPIO_COL] == municipio_escolhido]
-        df_empresas = all_data['empresas'][all_data['empresas'][MUNICIPIO_COL] == municipio_escolhido]
-        df_inst_ensino_rede = all_data['instituicoes_ensino'][all_data['instituicoes_ensino'][MUNICIPIO_COL] == municipio_escolhido].groupby(REDE_ENSINO_COL, as_index=False).size().rename(columns={'size': INST_ENSINO_QTD_COL})
-        df_inst_ensino_nivel = all_data['instituicoes_ensino'][all_data['instituicoes_ensino'][MUNICIPIO_COL] == municipio_escolhido].groupby(NIVEL_ENSINO_COL, as_index=False).size().rename(columns={'size': INST_ENSINO_QTD_COL})
-        df_ideb = all_data['ideb'][all_data['ideb'][MUNICIPIO_COL] == municipio_escolhido]
-        df_instituicoes = all_data['instituicoes'][all_data['instituicoes'][MUNICIPIO_COL] == municipio_escolhido].groupby(CATEGORIA_INST_COL, as_index=False).size().rename(columns={'size': INST_CATEGORIA_QTD_COL})
-        df_inst_cards = all_data['instituicoes'][all_data['instituicoes'][MUNICIPIO_COL] == municipio_escolhido]
+    # --- Dados da Seleção ---
+    # As séries de todas as visões já foram agregadas no carregamento (ver aggregations.py),
+    # então a troca de seleção é apenas uma consulta ao dicionário
+    is_regional_view = (municipio_escolhido == REGIONAL_VIEW)
+    visao = carga.cubo[municipio_escolhido]
+    df_geo = visao['geo']
 
     st.markdown("<hr style='margin-top:2em; margin-bottom:2em;'>", unsafe_allow_html=True)
     
     # --- Título Dinâmico da Seção ---
-    view_title = "Resumo da Região do Caparaó" if is_regional_view else f"Resumo de {municipio_escolhido}"
+    view_title = region_title(regiao) if is_regional_view else f"Resumo de {municipio_escolhido}"
     st.markdown(f"<h2 style='text-align:center;'>{view_title}</h2>", unsafe_allow_html=True)
 
     # --- Seção: KPIs (Indicadores Chave) ---
-    if not df_cidades_filtrado.empty:
-        # Cálculos dos KPIs com base nos dados filtrados
-        idh_medio = df_cidades_filtrado[IDH_COL].mean()
-        pib_per_capita = df_cidades_filtrado[PIB_PER_CAPITA_COL].mean()
-        pop_estimada = df_cidades_filtrado[POP_ESTIMADA_COL].sum()
-        habitantes = df_cidades_filtrado[HABITANTES_COL].sum()
-        pop_idade_ativa = df_cidades_filtrado[POP_ATIVA_COL].sum()
-        perc_pop_ocupada = df_cidades_filtrado[POP_OCUPADA_COL].mean()
-        renda_per_capita_sm = df_cidades_filtrado[RENDA_PER_CAPITA_SM_COL].mean()
-        perc_pop_ativa = (pop_idade_ativa / habitantes) * 100 if habitantes > 0 else 0
-
-        # Função para criar os cartões de KPI
-        def kpi_card(title, value, emoji, color="#000"):
-            st.markdown(f"""
-            <div style='border-radius: 10px; margin: 1em; padding: 15px; background-color: #f8f9fa; text-align: center;
-                         box-shadow: 0 2px 4px rgba(0,0,0,0.1); height: 100%;'>
-                <div style='font-size: 24px'>{emoji}</div>
-                <div style='font-size: 13px; color: grey'>{title}</div>
-                <div style='font-size: 20px; font-weight: bold; color:{color}'>{value}</div>
-            </div>""", unsafe_allow_html=True)
-
+    # Pré-calculados para a seleção (ver aggregations.py)
+    kpis = visao['kpis']
+    if kpis:
         # Exibição dos KPIs em duas linhas
-        cols_kpi1 = st.columns(4)
-        with cols_kpi1[0]: kpi_card("IDH MÉDIO", f"{idh_medio:.3f}", "📈", "#FFA500")
-        with cols_kpi1[1]: kpi_card("PIB PER CAPITA", f"R$ {pib_per_capita:,.2f}", "💰", "#28a745")
-        with cols_kpi1[2]: kpi_card("POP. ESTIMADA 2024", f"{pop_estimada:,.0f}", "👥", "#007bff")
-        with cols_kpi1[3]: kpi_card("HABITANTES (CENSO)", f"{habitantes:,.0f}", "🏡", "#6f42c1")
-        
-        cols_kpi2 = st.columns(4)
-        with cols_kpi2[0]: kpi_card("POP. IDADE ATIVA", f"{pop_idade_ativa:,.0f}", "💪", "#dc3545")
-        with cols_kpi2[1]: kpi_card("% POP. ATIVA", f"{perc_pop_ativa:.1f}%", "🧠", "#6c757d")
-        with cols_kpi2[2]: kpi_card("% POP. OCUPADA", f"{perc_pop_ocupada:.1f}%", "👷", "#ffc107")
-        with cols_kpi2[3]: kpi_card("RENDA PER CAPITA (SM)", f"{renda_per_capita_sm:.2f}", "💵", "#20c997")
+        for linha in (KPI_CARDS[:4], KPI_CARDS[4:]):
+            for coluna, (titulo, chave, formato, emoji, cor) in zip(st.columns(4), linha):
+                with coluna: kpi_card(titulo, formato.format(kpis[chave]), emoji, cor)
 
     st.markdown("<hr style='margin-top:2em; margin-bottom:2em;'>", unsafe_allow_html=True)
     
@@ -180,110 +205,195 @@ if all_data:
     # Gráfico de Concentração Geográfica
     if not df_geo.empty:
         st.markdown("<h3 style='text-align:center;'>Concentração Geográfica</h3>", unsafe_allow_html=True)
-        zona_urbana_df = df_geo[df_geo[ZONA_COL] == 'Urbana']
-        zona_rural_df = df_geo[df_geo[ZONA_COL] == 'Rural']
-        zona_urbana = zona_urbana_df[PERCENTUAL_COL].values[0] if not zona_urbana_df.empty else 0
-        zona_rural = zona_rural_df[PERCENTUAL_COL].values[0] if not zona_rural_df.empty else 0
-
-        geo_df_pie = pd.DataFrame({'Zona': ['Urbana', 'Rural'], 'Valor': [zona_urbana, zona_rural]})
-        fig_geo = px.pie(geo_df_pie, names='Zona', values='Valor', hole=0.5, color_discrete_sequence=['#1f77b4', '#2ca02c'])
-        fig_geo.update_traces(textinfo='none', hoverinfo='label+percent')
-        fig_geo.update_layout(showlegend=False, margin=dict(t=20, b=20))
+        zona_urbana, zona_rural = zonas_urbana_rural(df_geo)
         
         c1, c2, c3 = st.columns([1, 1.5, 1])
         with c2:
-            st.plotly_chart(fig_geo, use_container_width=True)
+            grafico('geo_pizza', municipio_escolhido, carga, "Não há dados geográficos para a seleção atual.")
 
         c1, c2 = st.columns(2)
         with c1: st.markdown(f'<div style="text-align: center;">🏙️ <b>ZONA URBANA</b><h3 style="color:#1f77b4;">{zona_urbana:.2f}%</h3></div>', unsafe_allow_html=True)
         with c2: st.markdown(f'<div style="text-align: center;">🏡 <b>ZONA RURAL</b><h3 style="color:#2ca02c;">{zona_rural:.2f}%</h3></div>', unsafe_allow_html=True)
         st.markdown("<hr style='margin-top:2em; margin-bottom:2em;'>", unsafe_allow_html=True)
 
-    # Gráficos de Economia
-    st.markdown("<h2 style='text-align:center;'>Economia e Mercado de Trabalho</h2>", unsafe_allow_html=True)
-    col1, col2 = st.columns(2)
-    with col1:
-        st.markdown("<h4 style='text-align:center;'>Empregos por Setor</h4>", unsafe_allow_html=True)
-        if not df_empregos_setor.empty:
-            fig = px.bar(df_empregos_setor.sort_values(EMPREGADOS_SETOR_VAL_COL, ascending=False), x=SETOR_COL, y=EMPREGADOS_SETOR_VAL_COL, color=SETOR_COL, text_auto='.2s')
-            fig.update_layout(showlegend=False, yaxis_title="Total de Empregados", xaxis_title=None)
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.warning("Não há dados de empregos por setor para a seleção atual.")
-    with col2:
-        st.markdown("<h4 style='text-align:center;'>Empregos por Faixa Etária</h4>", unsafe_allow_html=True)
-        if not df_empregos_faixa.empty:
-            # Garante a ordem correta das faixas etárias no eixo X
-            faixa_etaria_ordem = ["15-17", "18-24", "25-29", "30-39", "40-49", "50-64", "65-mais"]
-            fig = px.bar(df_empregos_faixa, x=FAIXA_ETARIA_COL, y=EMPREGADOS_FAIXA_ETARIA_VAL_COL, color=FAIXA_ETARIA_COL, text_auto='.2s')
-            fig.update_layout(showlegend=False, yaxis_title="Total de Empregados", xaxis_title="Faixa Etária", xaxis={'categoryorder':'array', 'categoryarray':faixa_etaria_ordem})
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.warning("Não há dados de empregos por faixa etária para a seleção atual.")
-
-    # Gráficos de Empreendedorismo
-    st.markdown("<h2 style='text-align:center;'>Empresas e Empreendedorismo</h2>", unsafe_allow_html=True)
-    col1, col2 = st.columns([3, 1])
-    with col1:
-        st.markdown("<h4 style='text-align:center;'>Empresas por Porte</h4>", unsafe_allow_html=True)
-        if not df_empresas.empty:
-            fig = px.pie(df_empresas, names=PORTE_EMPRESA_COL, values=EMPRESAS_QTD_COL, hole=0.5, color_discrete_sequence=px.colors.sequential.Oranges_r)
-            fig.update_traces(textinfo='percent+label')
-            st.plotly_chart(fig, use_container_width=True)
+    # Seções abaixo da dobra, calculadas sob demanda
+    secao_economia(regiao, municipio_escolhido)
+    secao_empreendedorismo(regiao, municipio_escolhido)
+    secao_educacao(regiao, municipio_escolhido)
+    secao_instituicoes(regiao, municipio_escolhido)
+
+@st.fragment
+@medido("secao:economia")
+def secao_economia(regiao, municipio_escolhido):
+    secao = secao_sob_demanda("Economia e Mercado de Trabalho", "economia")
+    if secao is None:
+        return
+    carga = carregar_dados(regiao)
+    if carga is None:
+        return
+    with secao:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("<h4 style='text-align:center;'>Empregos por Setor</h4>", unsafe_allow_html=True)
+            grafico('empregos_setor', municipio_escolhido, carga, "Não há dados de empregos por setor para a seleção atual.")
+        with col2:
+            st.markdown("<h4 style='text-align:center;'>Empregos por Faixa Etária</h4>", unsafe_allow_html=True)
+            grafico('empregos_faixa', municipio_escolhido, carga, "Não há dados de empregos por faixa etária para a seleção atual.")
+
+@st.fragment
+@medido("secao:empreendedorismo")
+def secao_empreendedorismo(regiao, municipio_escolhido):
+    secao = secao_sob_demanda("Empresas e Empreendedorismo", "empreendedorismo")
+    if secao is None:
+        return
+    carga = carregar_dados(regiao)
+    if carga is None:
+        return
+    with secao:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.markdown("<h4 style='text-align:center;'>Empresas por Porte</h4>", unsafe_allow_html=True)
+            grafico('empresas_porte', municipio_escolhido, carga, "Não há dados de empresas para a seleção atual.")
+        with col2:
+            # Contagem de instituições específicas (pré-calculada para a seleção)
+            inst_cards = carga.cubo[municipio_escolhido]['inst_cards']
+            for rotulo, subcategoria in INDICADOR_CARDS:
+                indicador_card(rotulo, inst_cards[subcategoria])
+
+@st.fragment
+@medido("secao:educacao")
+def secao_educacao(regiao, municipio_escolhido):
+    secao = secao_sob_demanda("Educação", "educacao")
+    if secao is None:
+        return
+    carga = carregar_dados(regiao)
+    if carga is None:
+        return
+    with secao:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown("<h4 style='text-align:center;'>Escolas por Rede de Ensino</h4>", unsafe_allow_html=True)
+            grafico('escolas_rede', municipio_escolhido, carga, "Não há dados de escolas por rede para a seleção atual.")
+        with col2:
+            st.markdown("<h4 style='text-align:center;'>IDEB Médio</h4>", unsafe_allow_html=True)
+            grafico('ideb', municipio_escolhido, carga, "Não há dados de IDEB para a seleção atual.")
+        with col3:
+            st.markdown("<h4 style='text-align:center;'>Instituições por Nível</h4>", unsafe_allow_html=True)
+            grafico('inst_nivel', municipio_escolhido, carga, "Não há dados de instituições por nível para a seleção atual.")
+
+@st.fragment
+@medido("secao:instituicoes")
+def secao_instituicoes(regiao, municipio_escolhido):
+    secao = secao_sob_demanda("Instituições Gerais", "instituicoes")
+    if secao is None:
+        return
+    carga = carregar_dados(regiao)
+    if carga is None:
+        return
+    with secao:
+        st.markdown("<h4 style='text-align:center;'>Instituições por Categoria</h4>", unsafe_allow_html=True)
+        grafico('instituicoes_categoria', municipio_escolhido, carga, "Não há dados de instituições para a seleção atual.")
+
+@st.fragment
+@medido("secao:comparacao")
+def secao_comparacao(regiao):
+    secao = secao_sob_demanda("Comparação entre Municípios", "comparacao")
+    if secao is None:
+        return
+    carga = carregar_dados(regiao)
+    if carga is None:
+        return
+    with secao:
+        # Indicadores de todos os municípios, calculados em lote uma vez por versão (ver aggregations.py);
+        # escolher outros municípios só recorta a tabela
+        with etapa("comparacao"):
+            tabela = carga.cubo.comparacao
+            posicoes = rankings(tabela)
+        escolhidos = st.multiselect(
+            "Municípios para comparar:",
+            options=list(tabela.index),
+            default=list(tabela.index[:3]),
+            key=f"comparacao_{regiao}",
+        )
+        if not escolhidos:
+            st.info("Selecione ao menos um município para comparar.")
+            return
+
+        st.caption(f"Entre parênteses, a posição do município entre os {len(tabela)} da região (1º = maior valor).")
+        st.dataframe(comparison_display(tabela.loc[escolhidos], posicoes.loc[escolhidos]), width="stretch")
+
+        chave = st.selectbox(
+            "Ranking por indicador:",
+            options=list(tabela.columns),
+            format_func=lambda c: comparison_column(c)[0],
+            key=f"comparacao_indicador_{regiao}",
+        )
+        with etapa("figura:comparacao"):
+            fig = build_comparison_figure(tabela.loc[escolhidos], chave)
+        if fig is not None:
+            st.plotly_chart(fig, width="stretch")
         else:
-            st.warning("Não há dados de empresas para a seleção atual.")
-    with col2:
-        def indicador_card(label, valor):
-            st.markdown(f"""
-            <div style='border-radius: 8px; background-color:#f8f9fa; padding: 15px; margin-bottom: 10px; text-align: center; box-shadow: 0 1px 3px rgba(0,0,0,0.1);'>
-                <div style='font-size:14px; font-weight: bold; color:#555;'>{label}</div>
-                <div style='font-size:24px; font-weight: bold; color:#007bff;'>{valor}</div>
-            </div>""", unsafe_allow_html=True)
-        
-        # Contagem de instituições específicas com base nos dados filtrados
-        ace_count = df_inst_cards[df_inst_cards[SUBCATEGORIA_INST_COL] == 'Aceleradora'].shape[0]
-        cow_count = df_inst_cards[df_inst_cards[SUBCATEGORIA_INST_COL] == 'Coworking'].shape[0]
-        inc_count = df_inst_cards[df_inst_cards[SUBCATEGORIA_INST_COL] == 'Incubadora'].shape[0]
-        
-        indicador_card("Aceleradoras", ace_count)
-        indicador_card("Coworkings", cow_count)
-        indicador_card("Incubadoras", inc_count)
+            st.warning("Não há dados deste indicador para os municípios selecionados.")
+
+
+# --- Painel de Perfil (?perfil=1) ---
+@st.fragment
+def painel_perfil(regiao):
+    instrumentacao = get_instrumentation()
+    cache = get_figure_cache()
+    with st.expander("Perfil de desempenho", expanded=True):
+        st.caption(f"Medições das últimas execuções de todas as sessões deste processo · cache de figuras: {len(cache)} entradas, {cache.hits} acertos, {cache.misses} faltas")
+        if not shared_mode_enabled():
+            carregadas = ", ".join(f"{nome} ({mb:.1f} MB)" for nome, _, mb in get_regions().loaded())
+            st.caption(f"Regiões em memória: {carregadas or 'nenhuma'} · orçamento: {REGION_MEMORY_BUDGET_MB} MB")
+        st.dataframe(instrumentacao.resumo(), width="stretch", hide_index=True)
+        carga = carregar_dados(regiao)
+        if carga:
+            st.caption(f"Memória das tabelas de {regiao} (tipos compactos, ver compact_dtypes.py)")
+            st.dataframe(memory_report(carga.dados), width="stretch", hide_index=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("Exportar JSON lines", instrumentacao.to_jsonl(), file_name="perfil_dashboard.jsonl", mime="application/x-ndjson")
+        with col2:
+            st.button("Atualizar")
+
+# --- Início do Layout do Aplicativo ---
+
+# --- Seleção da Região ---
+# Só aparece quando há mais de uma região em REGIONS_DIR; as demais só são carregadas quando escolhidas
+regioes = get_regions().names()
+regiao = st.selectbox("Região:", regioes, key="regiao") if len(regioes) > 1 else regioes[0]
+
+# Carrega os dados e o cubo de agregações da região usando as funções acima
+carga = carregar_dados(regiao)
+
+# Só executa o resto do aplicativo se os dados foram carregados com sucesso
+if carga:
     
-    # Gráficos de Educação
-    st.markdown("<h2 style='text-align:center;'>Educação</h2>", unsafe_allow_html=True)
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.markdown("<h4 style='text-align:center;'>Escolas por Rede de Ensino</h4>", unsafe_allow_html=True)
-        if not df_inst_ensino_rede.empty:
-            fig = px.bar(df_inst_ensino_rede.sort_values(INST_ENSINO_QTD_COL, ascending=False), x=REDE_ENSINO_COL, y=INST_ENSINO_QTD_COL, color=REDE_ENSINO_COL, text_auto=True)
-            fig.update_layout(showlegend=False, yaxis_title="Nº de Escolas", xaxis_title=None)
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.warning("Não há dados de escolas por rede para a seleção atual.")
-    with col2:
-        st.markdown("<h4 style='text-align:center;'>IDEB Médio</h4>", unsafe_allow_html=True)
-        if not df_ideb.empty:
-            fig = px.bar(df_ideb, x=ETAPA_ENSINO_COL, y=IDEB_VAL_COL, color=ETAPA_ENSINO_COL, text=IDEB_VAL_COL, color_discrete_sequence=["#1f77b4", "#ff7f0e", "#2ca02c"])
-            fig.update_traces(texttemplate='%{text:.2f}')
-            fig.update_layout(showlegend=False, yaxis_title="Nota IDEB", xaxis_title=None)
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.warning("Não há dados de IDEB para a seleção atual.")
-    with col3:
-        st.markdown("<h4 style='text-align:center;'>Instituições por Nível</h4>", unsafe_allow_html=True)
-        if not df_inst_ensino_nivel.empty:
-            fig = px.bar(df_inst_ensino_nivel.sort_values(INST_ENSINO_QTD_COL, ascending=False), x=NIVEL_ENSINO_COL, y=INST_ENSINO_QTD_COL, color=NIVEL_ENSINO_COL, text_auto=True)
-            fig.update_layout(showlegend=False, yaxis_title="Nº de Instituições", xaxis_title=None)
-            st.plotly_chart(fig, use_container_width=True)
-        else:
-            st.warning("Não há dados de instituições por nível para a seleção atual.")
-            
-    # Gráfico de Instituições Gerais
-    st.markdown("<h2 style='text-align:center;'>Instituições Gerais</h2>", unsafe_allow_html=True)
-    st.markdown("<h4 style='text-align:center;'>Instituições por Categoria</h4>", unsafe_allow_html=True)
-    if not df_instituicoes.empty:
-        fig = px.bar(df_instituicoes.sort_values(INST_CATEGORIA_QTD_COL, ascending=False), x=CATEGORIA_INST_COL, y=INST_CATEGORIA_QTD_COL, color=CATEGORIA_INST_COL, text_auto=True)
-        fig.update_layout(showlegend=False, yaxis_title="Nº de Instituições", xaxis_title=None)
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("Não há dados de instituições para a seleção atual.")
\ No newline at end of file
+    # --- Título Principal ---
+    st.markdown("<h1 style='text-align:center; color: #0dcaf0;'>Dashboard Gênesis Caparaó</h1>", unsafe_allow_html=True)
+    carregado_em = datetime.fromtimestamp(carga.carregado_em).strftime("%d/%m/%Y %H:%M:%S")
+    st.markdown(f"<p style='text-align:center; color: grey; font-size: 12px;'>Dados: versão {carga.versao} · carregados em {carregado_em} ({carga.duracao:.2f} s)</p>", unsafe_allow_html=True)
+    ultimo_erro = None if shared_mode_enabled() else get_regions().store(regiao).ultimo_erro
+    if ultimo_erro:
+        st.warning(f"Não foi possível atualizar os dados; exibindo a versão anterior. Detalhe: {ultimo_erro}")
+
+    # Células das fontes fora do formato declarado no COLUMN_SCHEMA (ver schema_parser.py)
+    problemas = parse_report(carga.dados)
+    if not problemas.empty:
+        with st.expander(f"⚠️ Valores das fontes que não puderam ser lidos (ficaram em branco): {len(problemas)}"):
+            st.dataframe(problemas, width="stretch", hide_index=True)
+
+    # --- Mapa Interativo e Filtro ---
+    secao_mapa(regiao)
+
+    # --- Painel do Município Selecionado ---
+    painel_municipal(regiao)
+
+    # --- Comparação entre Municípios ---
+    secao_comparacao(regiao)
+
+get_instrumentation().registrar("execucao_completa", (time.perf_counter() - inicio_execucao) * 1000, id_sessao())
+
+if perfil_ativo():
+    painel_perfil(regiao)
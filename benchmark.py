@@ -0,0 +1,269 @@
+# benchmark.py
+
+"""
+Benchmarks do dashboard, sem navegador.
+
+Para cada cenário (as fontes reais ou dados sintéticos com mais municípios
+e/ou mais linhas, ver synthetic_data.py) mede:
+
+- carga dos dados fria (parsing das fontes + snapshot) e quente (snapshot);
+- cálculo do cubo de agregações, de cada visão (regional e por município) e
+  dos indicadores de comparação de todos os municípios, além do filtro por máscara booleana que o app fazia a cada interação;
+- construção e serialização JSON de cada gráfico;
+- execuções completas do app.py pelo AppTest do Streamlit, uma por visão,
+  com as seções sob demanda fechadas e com todas abertas.
+
+Os resultados vão para um arquivo JSON para comparar execuções:
+
+    python benchmark.py                                   # cenários padrão
+    python benchmark.py --cenarios real 12x10 120x1 --saida antes.json
+    python benchmark.py --comparar antes.json depois.json
+
+Cenários sintéticos são escritos como MUNICIPIOSxFATOR (ex.: 12x100 são
+os 12 municípios com 100 vezes mais linhas por município).
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import plotly
+
+from aggregations import _agregar_visao, PARTITION_COLUMNS, build_cube, comparison_table
+from charts import CHARTS, build_map_figure
+from config import *
+from data_snapshot import load_all_data
+from synthetic_data import generate
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+FONTES = [CIDADES_FILE, BASE_DE_DADOS_XLSX_FILE, GEOJSON_FILE]
+CENARIOS_PADRAO = ["real", "12x10", "12x100", "120x1"]
+# Chaves das seções sob demanda do app.py (expander "secao_<chave>"), abertas nas execuções medidas
+SECOES_APP = ["economia", "empreendedorismo", "educacao", "instituicoes", "comparacao"]
+
+
+def _medir(func, repeticoes, preparar=None):
+    """Executa `func` `repeticoes` vezes e retorna os tempos em ms (`preparar` roda antes, fora da medição)."""
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        func()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def _resultado(cenario, nome, tempos, **extra):
+    return {
+        "cenario": cenario,
+        "benchmark": nome,
+        "n": len(tempos),
+        "mediana_ms": round(statistics.median(tempos), 3),
+        "min_ms": round(min(tempos), 3),
+        "max_ms": round(max(tempos), 3),
+        **extra,
+    }
+
+
+@contextmanager
+def _pasta_do_cenario(cenario):
+    """Diretório de trabalho com as fontes do cenário (cópia das reais ou geradas)."""
+    pasta = tempfile.mkdtemp(prefix="bench-caparao-")
+    anterior = os.getcwd()
+    try:
+        if cenario == "real":
+            for arquivo in FONTES:
+                shutil.copy(os.path.join(RAIZ, arquivo), pasta)
+        else:
+            municipios, fator = (int(x) for x in cenario.split("x"))
+            generate(pasta, municipios, fator)
+        os.chdir(pasta)
+        yield pasta
+    finally:
+        os.chdir(anterior)
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+# --- Benchmarks ---
+
+def bench_carga(cenario, repeticoes):
+    def limpar_snapshot():
+        shutil.rmtree(os.path.dirname(SNAPSHOT_FILE) or ".cache", ignore_errors=True)
+
+    frio = _medir(load_all_data, repeticoes, preparar=limpar_snapshot)
+    quente = _medir(load_all_data, repeticoes)
+    linhas = sum(len(df) for df in load_all_data().values() if isinstance(df, pd.DataFrame))
+    return [
+        _resultado(cenario, "carga_fria", frio, linhas=linhas),
+        _resultado(cenario, "carga_quente", quente, linhas=linhas),
+    ]
+
+
+def bench_agregacao(cenario, repeticoes, dados):
+    # Construção: índice por município de cada tabela mais a visão regional
+    resultados = [_resultado(cenario, "cubo_construcao", _medir(lambda: build_cube(dados), repeticoes))]
+
+    tabelas = {k: v for k, v in dados.items() if k in PARTITION_COLUMNS}
+    municipios = sorted(dados['cidades'][CIDADES_MUNICIPIO_COL].unique())
+    resultados.append(_resultado(cenario, "agregacao_regional", _medir(lambda: _agregar_visao(tabelas, True), repeticoes)))
+
+    # Primeira consulta de cada município em um cubo novo (as seguintes são só leitura do dicionário)
+    cubos = []
+    def todas_as_visoes_municipais():
+        cubo = cubos.pop()
+        for m in municipios:
+            cubo[m]
+    resultados.append(_resultado(
+        cenario, "agregacao_municipios",
+        _medir(todas_as_visoes_municipais, repeticoes, preparar=lambda: cubos.append(build_cube(dados))),
+        municipios=len(municipios),
+    ))
+
+    # Indicadores do modo de comparação de todos os municípios, em lote (um groupby por tabela)
+    resultados.append(_resultado(cenario, "comparacao_lote", _medir(lambda: comparison_table(dados), repeticoes), municipios=len(municipios)))
+
+    # Custo por interação do modelo antigo: uma máscara booleana por tabela a cada seleção
+    def filtro_por_mascara():
+        for m in municipios:
+            for chave, df in tabelas.items():
+                coluna = PARTITION_COLUMNS[chave]
+                if coluna in df.columns:
+                    df[df[coluna] == m]
+    resultados.append(_resultado(cenario, "filtro_mascara_municipios", _medir(filtro_por_mascara, repeticoes), municipios=len(municipios)))
+    return resultados
+
+
+def bench_figuras(cenario, repeticoes, dados, cubo):
+    resultados = []
+    construtores = {'mapa': lambda: build_map_figure(dados['cidades'], dados['geojson'])}
+    municipio = next(m for m in cubo if m != REGIONAL_VIEW)
+    for chart_id, builder in CHARTS.items():
+        for selecao in (REGIONAL_VIEW, municipio):
+            rotulo = 'regional' if selecao == REGIONAL_VIEW else 'municipio'
+            construtores[f"{chart_id}@{rotulo}"] = lambda b=builder, s=selecao: b(cubo[s])
+
+    for nome, construir in construtores.items():
+        figura = construir()
+        if figura is None:
+            continue
+        json_figura = figura.to_json()
+        resultados.append(_resultado(cenario, f"figura:{nome}", _medir(construir, repeticoes)))
+        resultados.append(_resultado(cenario, f"json:{nome}", _medir(figura.to_json, repeticoes), bytes=len(json_figura)))
+    return resultados
+
+
+def bench_app(cenario, repeticoes):
+    """
+    Execuções completas do app.py (AppTest), uma por visão, com os caches já
+    aquecidos: primeiro com as seções sob demanda fechadas (como a página
+    abre) e depois com todas abertas, renderizando todos os gráficos.
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    # Os caches de @st.cache_resource são globais no processo; cada cenário começa do zero
+    st.cache_resource.clear()
+    st.cache_data.clear()
+
+    app = AppTest.from_file(os.path.join(RAIZ, "app.py"), default_timeout=300)
+    primeira = _medir(app.run, 1)
+    if app.exception:
+        raise RuntimeError(f"app.py falhou no cenário {cenario}: {app.exception[0].message}")
+
+    visoes = list(app.selectbox[0].options)
+    def percorrer_visoes():
+        for visao in visoes:
+            app.selectbox[0].select(visao).run()
+    fechadas = [t / len(visoes) for t in _medir(percorrer_visoes, repeticoes)]
+    graficos_fechadas = len(app.get("plotly_chart"))
+
+    for chave in SECOES_APP:
+        app.session_state[f"secao_{chave}"] = True
+    app.run()
+    tempos = [t / len(visoes) for t in _medir(percorrer_visoes, repeticoes)]
+    if app.exception:
+        raise RuntimeError(f"app.py falhou no cenário {cenario}: {app.exception[0].message}")
+    return [
+        _resultado(cenario, "app_primeira_execucao", primeira),
+        _resultado(cenario, "app_execucao_por_visao_secoes_fechadas", fechadas, visoes=len(visoes), graficos=graficos_fechadas),
+        _resultado(cenario, "app_execucao_por_visao", tempos, visoes=len(visoes), graficos=len(app.get("plotly_chart"))),
+    ]
+
+
+def run(cenarios, repeticoes, com_app=True):
+    resultados = []
+    for cenario in cenarios:
+        with _pasta_do_cenario(cenario):
+            print(f"[{cenario}] carga...", flush=True)
+            resultados += bench_carga(cenario, repeticoes)
+            dados = load_all_data()
+            cubo = build_cube(dados)
+            print(f"[{cenario}] agregação...", flush=True)
+            resultados += bench_agregacao(cenario, repeticoes, dados)
+            print(f"[{cenario}] figuras...", flush=True)
+            resultados += bench_figuras(cenario, repeticoes, dados, cubo)
+            if com_app:
+                print(f"[{cenario}] app (AppTest)...", flush=True)
+                resultados += bench_app(cenario, repeticoes)
+    return resultados
+
+
+def _metadados():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "plotly": plotly.__version__,
+        "maquina": platform.platform(),
+    }
+
+
+def compare(arquivo_antes, arquivo_depois):
+    """Imprime a variação da mediana de cada benchmark presente nos dois arquivos."""
+    with open(arquivo_antes, encoding="utf-8") as f:
+        antes = {(r["cenario"], r["benchmark"]): r for r in json.load(f)["resultados"]}
+    with open(arquivo_depois, encoding="utf-8") as f:
+        depois = {(r["cenario"], r["benchmark"]): r for r in json.load(f)["resultados"]}
+    for chave in sorted(antes.keys() & depois.keys()):
+        a, d = antes[chave]["mediana_ms"], depois[chave]["mediana_ms"]
+        variacao = (d - a) / a * 100 if a else 0.0
+        print(f"{chave[0]:>8} {chave[1]:<45} {a:>10.2f} ms -> {d:>10.2f} ms ({variacao:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de carga, agregação, figuras e execução do app.")
+    parser.add_argument("--cenarios", nargs="+", default=CENARIOS_PADRAO, help="'real' ou MUNICIPIOSxFATOR, ex.: 12x100")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--sem-app", action="store_true", help="não executa o app.py pelo AppTest")
+    parser.add_argument("--saida", default="benchmark_results.json")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+    args = parser.parse_args()
+
+    if args.comparar:
+        compare(*args.comparar)
+        return
+
+    resultados = run(args.cenarios, args.repeticoes, com_app=not args.sem_app)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump({"metadados": _metadados(), "resultados": resultados}, f, ensure_ascii=False, indent=2)
+    for r in resultados:
+        print(f"{r['cenario']:>8} {r['benchmark']:<45} {r['mediana_ms']:>10.2f} ms")
+    print(f"Resultados gravados em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# charts.py
+
+"""
+Definições dos gráficos do dashboard.
+
+Cada gráfico é uma função registrada com `@register_chart` que recebe as
+séries de uma visão (uma entrada do cubo de aggregations.py) e devolve a
+figura Plotly, ou None quando não há dados para a seleção. Manter as
+definições aqui permite que o app e o cache de figuras construam o mesmo
+gráfico a partir do mesmo id.
+"""
+
+import math
+
+import pandas as pd
+import plotly.express as px
+
+from config import *
+
+# Id do gráfico -> função que recebe a visão e devolve a figura (ou None)
+CHARTS = {}
+
+# Garante a ordem correta das faixas etárias no eixo X
+FAIXA_ETARIA_ORDEM = ["15-17", "18-24", "25-29", "30-39", "40-49", "50-64", "65-mais"]
+
+
+def register_chart(chart_id):
+    """Registra a função que constrói o gráfico `chart_id` a partir de uma visão do cubo."""
+    def decorator(func):
+        CHARTS[chart_id] = func
+        return func
+    return decorator
+
+
+# --- Cartões ---
+# Usados pelo app (st.markdown) e pela exportação estática (static_export.py)
+
+# (título, chave em visao['kpis'], formato, emoji, cor), em duas linhas de quatro
+KPI_CARDS = [
+    ("IDH MÉDIO", 'idh_medio', "{:.3f}", "📈", "#FFA500"),
+    ("PIB PER CAPITA", 'pib_per_capita', "R$ {:,.2f}", "💰", "#28a745"),
+    ("POP. ESTIMADA 2024", 'pop_estimada', "{:,.0f}", "👥", "#007bff"),
+    ("HABITANTES (CENSO)", 'habitantes', "{:,.0f}", "🏡", "#6f42c1"),
+    ("POP. IDADE ATIVA", 'pop_idade_ativa', "{:,.0f}", "💪", "#dc3545"),
+    ("% POP. ATIVA", 'perc_pop_ativa', "{:.1f}%", "🧠", "#6c757d"),
+    ("% POP. OCUPADA", 'perc_pop_ocupada', "{:.1f}%", "👷", "#ffc107"),
+    ("RENDA PER CAPITA (SM)", 'renda_per_capita_sm', "{:.2f}", "💵", "#20c997"),
+]
+
+# (rótulo, subcategoria em visao['inst_cards'])
+INDICADOR_CARDS = [("Aceleradoras", 'Aceleradora'), ("Coworkings", 'Coworking'), ("Incubadoras", 'Incubadora')]
+
+
+def region_title(regiao):
+    """Título da visão regional (a região padrão mantém o título original do painel)."""
+    return "Resumo da Região do Caparaó" if regiao == DEFAULT_REGION else f"Resumo da Região {regiao}"
+
+
+def kpi_card_html(title, value, emoji, color="#000"):
+    return f"""
+    <div style='border-radius: 10px; margin: 1em; padding: 15px; background-color: #f8f9fa; text-align: center;
+                 box-shadow: 0 2px 4px rgba(0,0,0,0.1); height: 100%;'>
+        <div style='font-size: 24px'>{emoji}</div>
+        <div style='font-size: 13px; color: grey'>{title}</div>
+        <div style='font-size: 20px; font-weight: bold; color:{color}'>{value}</div>
+    </div>"""
+
+
+def indicador_card_html(label, valor):
+    return f"""
+    <div style='border-radius: 8px; background-color:#f8f9fa; padding: 15px; margin-bottom: 10px; text-align: center; box-shadow: 0 1px 3px rgba(0,0,0,0.1);'>
+        <div style='font-size:14px; font-weight: bold; color:#555;'>{label}</div>
+        <div style='font-size:24px; font-weight: bold; color:#007bff;'>{valor}</div>
+    </div>"""
+
+
+# --- Mapa ---
+
+def _enquadramento(geojson):
+    """Centro e zoom do mapa a partir dos limites das geometrias."""
+    xs, ys = [], []
+    for feature in geojson["features"]:
+        geometria = feature["geometry"]
+        poligonos = geometria["coordinates"] if geometria["type"] == "MultiPolygon" else [geometria["coordinates"]]
+        for poligono in poligonos:
+            xs += [x for x, _ in poligono[0]]
+            ys += [y for _, y in poligono[0]]
+    extensao = max(max(xs) - min(xs), max(ys) - min(ys), 1e-3)
+    zoom = max(1, min(10, math.log2(360 / extensao) - 0.5))
+    return {"lat": (min(ys) + max(ys)) / 2, "lon": (min(xs) + max(xs)) / 2}, zoom
+
+
+def build_map_figure(df_cidades, geojson):
+    """Mapa coroplético do IDH da região; não depende da seleção de município."""
+    # Junta cidades e geometrias pelo código IBGE da coluna CD_MUN do cidades.csv (nomes se repetem entre estados)
+    if CD_MUN_COL in df_cidades.columns:
+        df_mapa = df_cidades
+    else:
+        # cidades.csv sem a coluna: o código vem do GeoJSON pelo nome, o que só é seguro sem nomes repetidos na região
+        codigos = {f["properties"]["NM_MUN"]: f["properties"]["CD_MUN"] for f in geojson["features"]}
+        df_mapa = df_cidades.assign(**{CD_MUN_COL: df_cidades[CIDADES_MUNICIPIO_COL].map(codigos)})
+    centro, zoom = _enquadramento(geojson)
+    fig_mapa = px.choropleth_mapbox(
+        df_mapa,
+        geojson=geojson,
+        locations=CD_MUN_COL,
+        featureidkey="properties.CD_MUN",
+        color=IDH_COL,
+        color_continuous_scale="Viridis",
+        mapbox_style="carto-positron",
+        center=centro,
+        zoom=zoom,
+        opacity=0.6,
+        hover_data={CIDADES_MUNICIPIO_COL: True, IDH_COL: True, PIB_PER_CAPITA_COL: ':.2f', CD_MUN_COL: False}
+    )
+    fig_mapa.update_layout(margin={"r":0,"t":0,"l":0,"b":0})
+    return fig_mapa
+
+
+# --- Gráficos por visão ---
+
+def zonas_urbana_rural(df_geo):
+    """Percentuais (urbana, rural) da visão; 0 quando a zona não aparece nos dados."""
+    zona_urbana_df = df_geo[df_geo[ZONA_COL] == 'Urbana']
+    zona_rural_df = df_geo[df_geo[ZONA_COL] == 'Rural']
+    zona_urbana = zona_urbana_df[PERCENTUAL_COL].values[0] if not zona_urbana_df.empty else 0
+    zona_rural = zona_rural_df[PERCENTUAL_COL].values[0] if not zona_rural_df.empty else 0
+    return zona_urbana, zona_rural
+
+
+@register_chart('geo_pizza')
+def _geo_pizza(visao):
+    df_geo = visao['geo']
+    if df_geo.empty:
+        return None
+    zona_urbana, zona_rural = zonas_urbana_rural(df_geo)
+    geo_df_pie = pd.DataFrame({'Zona': ['Urbana', 'Rural'], 'Valor': [zona_urbana, zona_rural]})
+    fig_geo = px.pie(geo_df_pie, names='Zona', values='Valor', hole=0.5, color_discrete_sequence=['#1f77b4', '#2ca02c'])
+    fig_geo.update_traces(textinfo='none', hoverinfo='label+percent')
+    fig_geo.update_layout(showlegend=False, margin=dict(t=20, b=20))
+    return fig_geo
+
+
+@register_chart('empregos_setor')
+def _empregos_setor(visao):
+    df = visao['empregos_setor']
+    if df.empty:
+        return None
+    fig = px.bar(df.sort_values(EMPREGADOS_SETOR_VAL_COL, ascending=False), x=SETOR_COL, y=EMPREGADOS_SETOR_VAL_COL, color=SETOR_COL, text_auto='.2s')
+    fig.update_layout(showlegend=False, yaxis_title="Total de Empregados", xaxis_title=None)
+    return fig
+
+
+@register_chart('empregos_faixa')
+def _empregos_faixa(visao):
+    df = visao['empregos_faixa']
+    if df.empty:
+        return None
+    fig = px.bar(df, x=FAIXA_ETARIA_COL, y=EMPREGADOS_FAIXA_ETARIA_VAL_COL, color=FAIXA_ETARIA_COL, text_auto='.2s')
+    fig.update_layout(showlegend=False, yaxis_title="Total de Empregados", xaxis_title="Faixa Etária", xaxis={'categoryorder':'array', 'categoryarray':FAIXA_ETARIA_ORDEM})
+    return fig
+
+
+@register_chart('empresas_porte')
+def _empresas_porte(visao):
+    df = visao['empresas']
+    if df.empty:
+        return None
+    fig = px.pie(df, names=PORTE_EMPRESA_COL, values=EMPRESAS_QTD_COL, hole=0.5, color_discrete_sequence=px.colors.sequential.Oranges_r)
+    fig.update_traces(textinfo='percent+label')
+    return fig
+
+
+@register_chart('escolas_rede')
+def _escolas_rede(visao):
+    df = visao['inst_ensino_rede']
+    if df.empty:
+        return None
+    fig = px.bar(df.sort_values(INST_ENSINO_QTD_COL, ascending=False), x=REDE_ENSINO_COL, y=INST_ENSINO_QTD_COL, color=REDE_ENSINO_COL, text_auto=True)
+    fig.update_layout(showlegend=False, yaxis_title="Nº de Escolas", xaxis_title=None)
+    return fig
+
+
+@register_chart('ideb')
+def _ideb(visao):
+    df = visao['ideb']
+    if df.empty:
+        return None
+    fig = px.bar(df, x=ETAPA_ENSINO_COL, y=IDEB_VAL_COL, color=ETAPA_ENSINO_COL, text=IDEB_VAL_COL, color_discrete_sequence=["#1f77b4", "#ff7f0e", "#2ca02c"])
+    fig.update_traces(texttemplate='%{text:.2f}')
+    fig.update_layout(showlegend=False, yaxis_title="Nota IDEB", xaxis_title=None)
+    return fig
+
+
+@register_chart('inst_nivel')
+def _inst_nivel(visao):
+    df = visao['inst_ensino_nivel']
+    if df.empty:
+        return None
+    fig = px.bar(df.sort_values(INST_ENSINO_QTD_COL, ascending=False), x=NIVEL_ENSINO_COL, y=INST_ENSINO_QTD_COL, color=NIVEL_ENSINO_COL, text_auto=True)
+    fig.update_layout(showlegend=False, yaxis_title="Nº de Instituições", xaxis_title=None)
+    return fig
+
+
+@register_chart('instituicoes_categoria')
+def _instituicoes_categoria(visao):
+    df = visao['instituicoes']
+    if df.empty:
+        return None
+    fig = px.bar(df.sort_values(INST_CATEGORIA_QTD_COL, ascending=False), x=CATEGORIA_INST_COL, y=INST_CATEGORIA_QTD_COL, color=CATEGORIA_INST_COL, text_auto=True)
+    fig.update_layout(showlegend=False, yaxis_title="Nº de Instituições", xaxis_title=None)
+    return fig
+
+
+# --- Comparação entre municípios ---
+# Colunas de aggregations.comparison_table: as chaves dos KPIs, 'ideb_medio',
+# 'ideb:<etapa>', 'empregos_total' e 'empregos:<setor>'
+
+def comparison_column(chave):
+    """(rótulo, formato) de uma coluna da tabela de comparação."""
+    for titulo, chave_kpi, formato, _, _ in KPI_CARDS:
+        if chave == chave_kpi:
+            return titulo, formato
+    if chave == 'ideb_medio':
+        return "IDEB MÉDIO", "{:.2f}"
+    if chave.startswith('ideb:'):
+        return f"IDEB · {chave[len('ideb:'):].strip()}", "{:.2f}"
+    if chave == 'empregos_total':
+        return "EMPREGOS (TOTAL)", "{:,.0f}"
+    if chave.startswith('empregos:'):
+        return f"EMPREGOS · {chave[len('empregos:'):].strip()}", "{:,.0f}"
+    return chave, "{}"
+
+
+def comparison_display(tabela, posicoes=None):
+    """
+    Tabela de comparação para exibição: um indicador por linha, um
+    município por coluna, valores formatados ("-" sem dados). Com
+    `posicoes` (aggregations.rankings), mostra a posição de cada município
+    no indicador ao lado do valor.
+    """
+    linhas = {}
+    for chave in tabela.columns:
+        rotulo, formato = comparison_column(chave)
+        valores = [formato.format(v) if pd.notna(v) else "-" for v in tabela[chave]]
+        if posicoes is not None:
+            valores = [v if pd.isna(p) else f"{v} ({p}º)" for v, p in zip(valores, posicoes[chave])]
+        linhas[rotulo] = valores
+    return pd.DataFrame.from_dict(linhas, orient='index', columns=list(tabela.index))
+
+
+def build_comparison_figure(tabela, chave):
+    """Barras do indicador `chave` para os municípios da tabela, do maior para o menor (None sem dados)."""
+    serie = tabela[chave].dropna().sort_values()
+    if serie.empty:
+        return None
+    rotulo, formato = comparison_column(chave)
+    df = pd.DataFrame({CIDADES_MUNICIPIO_COL: serie.index.astype(str), rotulo: serie.to_numpy()})
+    texto = [formato.format(v) for v in serie]
+    fig = px.bar(df, x=rotulo, y=CIDADES_MUNICIPIO_COL, orientation='h', text=texto, color_discrete_sequence=["#0dcaf0"])
+    fig.update_layout(showlegend=False, yaxis_title=None, margin=dict(t=20, b=20), height=max(250, 40 * len(df)))
+    return fig
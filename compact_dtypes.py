@@ -0,0 +1,125 @@
+# compact_dtypes.py
+
+"""
+Representação compacta das tabelas carregadas.
+
+- As colunas de município de todas as tabelas viram categorias com um
+  único dicionário (CategoricalDtype) compartilhado: cada tabela guarda só
+  os códigos inteiros, e filtros, partições e groupbys por município
+  comparam inteiros em vez de textos.
+- As demais colunas de texto repetitivo (CATEGORICAL_COLUMNS no config.py)
+  viram categorias com o próprio dicionário.
+- Colunas inteiras são reduzidas ao menor tipo que comporta os valores;
+  colunas decimais só passam a float32 quando a conversão não altera
+  nenhum valor (IDH, PIB etc. continuam float64).
+
+A conversão é idempotente: a recarga a quente (data_watcher.py) aplica-a
+de novo depois de reler uma fonte, e só as colunas que mudaram são
+refeitas.
+
+Para ver o consumo de cada tabela antes e depois:
+    python compact_dtypes.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from config import *
+
+# Colunas de município de cada tabela (a do cidades.csv tem outro nome)
+MUNICIPIO_COLUMNS = [MUNICIPIO_COL, CIDADES_MUNICIPIO_COL]
+
+
+def _tabelas(data_sheets):
+    return {chave: df for chave, df in data_sheets.items() if isinstance(df, pd.DataFrame)}
+
+
+def municipality_dtype(data_sheets):
+    """Dicionário único de municípios: todos os nomes que aparecem em qualquer tabela, ordenados."""
+    nomes = set()
+    for df in _tabelas(data_sheets).values():
+        for coluna in MUNICIPIO_COLUMNS:
+            if coluna in df.columns:
+                valores = df[coluna]
+                nomes.update(valores.cat.categories if isinstance(valores.dtype, pd.CategoricalDtype) else valores.dropna().unique())
+    return pd.CategoricalDtype(sorted(nomes))
+
+
+def _categorizar(serie, dtype=None):
+    """Série categórica com o dicionário `dtype` (ou um próprio, se None); não refaz o que já está certo."""
+    if isinstance(serie.dtype, pd.CategoricalDtype) and (dtype is None or serie.dtype == dtype):
+        return serie
+    return serie.astype("category" if dtype is None else dtype)
+
+
+def _reduzir(serie):
+    """Menor tipo numérico que representa os valores sem perda."""
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        return pd.to_numeric(serie, downcast="integer")
+    if pd.api.types.is_float_dtype(serie.dtype) and serie.dtype != np.float32:
+        reduzida = serie.astype(np.float32)
+        if reduzida.astype(serie.dtype).equals(serie):
+            return reduzida
+    return serie
+
+
+def compact_frame(df, dtype_municipio):
+    """
+    Tabela com as colunas nos tipos compactos.
+
+    Retorna uma cópia rasa: a tabela original, que pode estar em uso por
+    outra versão dos dados, não é alterada.
+    """
+    df = df.copy(deep=False)
+    for coluna in df.columns:
+        serie = df[coluna]
+        if coluna in MUNICIPIO_COLUMNS:
+            df[coluna] = _categorizar(serie, dtype_municipio)
+        elif coluna in CATEGORICAL_COLUMNS and not pd.api.types.is_numeric_dtype(serie.dtype):
+            df[coluna] = _categorizar(serie)
+        elif pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+            df[coluna] = _reduzir(serie)
+    return df
+
+
+def compact_frames(data_sheets):
+    """
+    Aplica os tipos compactos a todas as tabelas do dicionário de dados, com
+    um dicionário de municípios compartilhado. Retorna o próprio dicionário.
+    """
+    dtype_municipio = municipality_dtype(data_sheets)
+    for chave, df in _tabelas(data_sheets).items():
+        data_sheets[chave] = compact_frame(df, dtype_municipio)
+    return data_sheets
+
+
+def memory_report(data_sheets):
+    """
+    Uma linha por tabela: linhas, colunas categóricas e memória em KB
+    (contando o conteúdo dos textos e, em cada tabela, o dicionário de
+    municípios, que na memória existe uma vez só).
+    """
+    linhas = []
+    for chave, df in _tabelas(data_sheets).items():
+        linhas.append({
+            "tabela": chave,
+            "linhas": len(df),
+            "categoricas": sum(isinstance(t, pd.CategoricalDtype) for t in df.dtypes),
+            "kb": round(df.memory_usage(index=True, deep=True).sum() / 1024, 1),
+        })
+    return pd.DataFrame(linhas, columns=["tabela", "linhas", "categoricas", "kb"])
+
+
+def main():
+    from data_snapshot import read_sources
+
+    antes = read_sources(compactar=False)
+    relatorio_antes = memory_report(antes)
+    relatorio = memory_report(compact_frames(antes))
+    relatorio.insert(3, "kb_antes", relatorio_antes["kb"])
+    print(relatorio.to_string(index=False))
+    print(f"Total: {relatorio['kb_antes'].sum():.1f} KB -> {relatorio['kb'].sum():.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,46 @@ CIDADES_FILE = "cidades.csv"
 GEOJSON_FILE = "municipios_caparao.geojson"
 BASE_DE_DADOS_XLSX_FILE = "base_de_dados.xlsx"
 
+# --- Geometria do Mapa (ver geo_preprocess.py) ---
+# Artefato compacto gerado a partir do GEOJSON_FILE e carregado pelo app
+GEOJSON_SIMPLIFIED_FILE = "municipios_caparao.min.geojson"
+GEO_SIMPLIFY_TOLERANCE = 0.0005  # em graus (~55 m), imperceptível no zoom do mapa
+GEO_COORD_DECIMALS = 4           # ~11 m de precisão
+GEO_KEEP_PROPERTIES = ["CD_MUN", "NM_MUN"]
+
+# --- Snapshot dos Dados (ver data_snapshot.py) ---
+# DataFrames já convertidos, reconstruído automaticamente quando as fontes mudam
+SNAPSHOT_FILE = ".cache/dados.pkl"
+SNAPSHOT_SCHEMA_VERSION = 4  # incrementar ao mudar as regras de conversão
+
+# --- Cache de Figuras (ver figure_cache.py) ---
+# 13 visões x ~8 gráficos cabem com folga; o excedente é descartado por LRU
+FIGURE_CACHE_MAXSIZE = 256
+
+# --- Armazenamento Compartilhado entre Réplicas (ver shared_store.py) ---
+# Ativado com DASHBOARD_SHARED_STORE=1; None usa /dev/shm (ou a pasta temporária do sistema)
+SHARED_STORE_DIR = None
+SHARED_STORE_POLL_SECONDS = 5   # intervalo com que o coordenador verifica as fontes
+SHARED_STORE_KEEP_VERSIONS = 2  # versões mantidas em disco para réplicas ainda conectadas
+SHARED_STORE_WAIT_SECONDS = 120 # espera máxima de uma réplica pela primeira versão publicada
+
+# --- Recarga a Quente (ver data_watcher.py) ---
+HOT_RELOAD_POLL_SECONDS = 5  # intervalo com que as fontes são verificadas
+
+# --- Instrumentação (ver instrumentation.py) ---
+PROFILE_MAX_RECORDS = 20000  # registros mantidos em memória para p50/p95
+PROFILE_LOG_FILE = None      # caminho de um .jsonl para gravar cada medição continuamente
+
+# --- Regiões (ver regions.py) ---
+# Cada subpasta de REGIONS_DIR é uma região, com os mesmos três arquivos de origem da pasta
+# principal (nomes acima); os arquivos da pasta principal formam a região DEFAULT_REGION
+REGIONS_DIR = "regioes"
+DEFAULT_REGION = "Caparaó"
+REGION_MEMORY_BUDGET_MB = 512  # acima disso as regiões usadas há mais tempo são descarregadas
+
+# --- Visões do Dashboard ---
+REGIONAL_VIEW = "Visão Regional"
+
 # --- Nomes das Abas (Sheets) ---
 SHEET_GEO = "Dados geográficos"
 SHEET_EMPREGOS_SETOR = "Empregados por setor"
@@ -57,10 +97,47 @@ INST_CATEGORIA_QTD_COL = "Nº de Instituições" # Nome da coluna gerada pelo c
 SUBCATEGORIA_INST_COL = "Subcategoria"
 
 # Colunas do arquivo cidades.csv (Estas não precisam de alteração)
+CIDADES_MUNICIPIO_COL = "MUNICIPIO"
+CD_MUN_COL = "CD_MUN" # Código IBGE; liga cada linha do cidades.csv à geometria do GeoJSON
 IDH_COL = "IDH (IBGE/2010)"
 PIB_PER_CAPITA_COL = "PIB / RENDA PER CAPITA (IBGE/2021)"
 POP_ESTIMADA_COL = "POPUL. ESTIMADA (IBGE/2024)"
 HABITANTES_COL = "HABITANTES (IJSN/2022)"
 POP_ATIVA_COL = "POPUL. COM IDADE ATIVA (IJSN/2022)"
 POP_OCUPADA_COL = "ÍNDICE DE POPUL. OCUPADA (IBGE/2022)"
-RENDA_PER_CAPITA_SM_COL = "MÉDIA DE RENDA PER CAPITA EM Nº DE SALÁRIOS MÍNIMOS (IBGE/2022)"
\ No newline at end of file
+RENDA_PER_CAPITA_SM_COL = "MÉDIA DE RENDA PER CAPITA EM Nº DE SALÁRIOS MÍNIMOS (IBGE/2022)"
+
+# --- Esquema das Colunas Numéricas (ver schema_parser.py) ---
+# Tipo de cada coluna no formato brasileiro, por arquivo CSV ou aba do XLSX:
+# "inteiro" (29.177), "decimal" (0,721), "percentual" (16,88%) ou "moeda" (R$ 19.255,36)
+COLUMN_SCHEMA = {
+    CIDADES_FILE: {
+        HABITANTES_COL: "inteiro",
+        POP_ATIVA_COL: "inteiro",
+        POP_ESTIMADA_COL: "inteiro",
+        IDH_COL: "decimal",
+        POP_OCUPADA_COL: "percentual",
+        RENDA_PER_CAPITA_SM_COL: "decimal",
+        PIB_PER_CAPITA_COL: "moeda",
+    },
+    SHEET_GEO: {PERCENTUAL_COL: "decimal"},
+    SHEET_EMPREGOS_SETOR: {EMPREGADOS_SETOR_VAL_COL: "inteiro"},
+    SHEET_EMPREGOS_FAIXA: {EMPREGADOS_FAIXA_ETARIA_VAL_COL: "inteiro"},
+    SHEET_EMPRESAS: {EMPRESAS_QTD_COL: "inteiro"},
+    SHEET_IDEB: {IDEB_VAL_COL: "decimal"},
+}
+
+# --- Tipos Compactos (ver compact_dtypes.py) ---
+# Colunas de texto repetitivo guardadas como categorias; as colunas de município
+# (MUNICIPIO_COL e CIDADES_MUNICIPIO_COL) compartilham um único dicionário entre as tabelas
+CATEGORICAL_COLUMNS = [
+    ZONA_COL,
+    SETOR_COL,
+    FAIXA_ETARIA_COL,
+    PORTE_EMPRESA_COL,
+    REDE_ENSINO_COL,
+    NIVEL_ENSINO_COL,
+    ETAPA_ENSINO_COL,
+    CATEGORIA_INST_COL,
+    SUBCATEGORIA_INST_COL,
+]
@@ -0,0 +1,287 @@
+# data_snapshot.py
+
+"""
+Snapshot binário dos dados do dashboard.
+
+Lê o cidades.csv e todas as abas do base_de_dados.xlsx uma única vez,
+converte as colunas numéricas pelo esquema do config.py (ver
+schema_parser.py), passa as tabelas para tipos compactos (ver
+compact_dtypes.py) e grava os DataFrames prontos em um único arquivo pickle
+versionado. Na inicialização o app carrega esse arquivo (milissegundos) em
+vez de refazer o parsing; o snapshot é reconstruído automaticamente quando
+algum arquivo de origem muda.
+
+A versão dos dados vem do hash das três fontes (cidades.csv, xlsx e
+GeoJSON) e dos parâmetros de simplificação do mapa, calculada do mesmo jeito
+aqui e na recarga a quente (data_watcher.py): ela dá nome aos arquivos do
+modo compartilhado, às chaves do cache de figuras e aos arquivos da
+exportação estática, então muda sempre que qualquer coisa exibida muda.
+
+Uso pela linha de comando:
+    python data_snapshot.py            # reconstrói o snapshot se estiver desatualizado
+    python data_snapshot.py --forcar   # reconstrói sempre
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import time
+
+import pandas as pd
+
+from config import *
+from compact_dtypes import compact_frames
+from geo_preprocess import load_geojson, simplification_parameters
+from schema_parser import empty_report, parse_columns, text_columns
+
+# Chave do dicionário de dados -> nome da aba no base_de_dados.xlsx
+XLSX_SHEETS = {
+    'geo_dados': SHEET_GEO,
+    'empregos_setor': SHEET_EMPREGOS_SETOR,
+    'empregos_faixa_etaria': SHEET_EMPREGOS_FAIXA,
+    'empresas': SHEET_EMPRESAS,
+    'instituicoes_ensino': SHEET_INST_ENSINO,
+    'ideb': SHEET_IDEB,
+    'instituicoes': SHEET_INSTITUICOES,
+}
+
+
+# --- Arquivos de uma pasta de dados ---
+
+def source_paths(pasta=""):
+    """
+    Caminhos das fontes e dos artefatos derivados de uma pasta de dados.
+
+    A pasta principal ("") guarda a região padrão; cada região em
+    REGIONS_DIR tem os mesmos arquivos (ver regions.py).
+    """
+    return {
+        'cidades': os.path.join(pasta, CIDADES_FILE),
+        'xlsx': os.path.join(pasta, BASE_DE_DADOS_XLSX_FILE),
+        'geojson': os.path.join(pasta, GEOJSON_FILE),
+        'geojson_min': os.path.join(pasta, GEOJSON_SIMPLIFIED_FILE),
+        'snapshot': os.path.join(pasta, SNAPSHOT_FILE),
+    }
+
+
+# --- Leitura e normalização das fontes ---
+
+def read_cidades(cidades_file=CIDADES_FILE, problemas=None):
+    """
+    Lê o cidades.csv e converte as colunas numéricas pelo COLUMN_SCHEMA.
+
+    Se `problemas` for um dicionário, o relatório de células inválidas vai
+    para problemas['cidades'].
+    """
+    # O código IBGE é texto, como no GeoJSON (CD_MUN)
+    df_cidades = pd.read_csv(cidades_file, sep=",", dtype={**text_columns(CIDADES_FILE), CD_MUN_COL: str})
+    df_cidades, relatorio = parse_columns(df_cidades, CIDADES_FILE)
+    if problemas is not None:
+        problemas['cidades'] = relatorio
+    return df_cidades
+
+
+def read_xlsx_sheets(xlsx_file=BASE_DE_DADOS_XLSX_FILE, chaves=None, problemas=None):
+    """
+    Lê as abas `chaves` (todas, por padrão) do workbook, convertendo as
+    colunas numéricas pelo COLUMN_SCHEMA.
+
+    O workbook é aberto uma única vez (pd.ExcelFile) e todas as abas são lidas
+    a partir dele, em vez de uma chamada de pd.read_excel por aba. Células
+    já numéricas são mantidas; as de texto passam pelo parser. Se
+    `problemas` for um dicionário, recebe o relatório de cada aba lida.
+    """
+    chaves = list(XLSX_SHEETS) if chaves is None else chaves
+    abas = {}
+    with pd.ExcelFile(xlsx_file) as workbook:
+        for chave in chaves:
+            abas[chave], relatorio = parse_columns(workbook.parse(XLSX_SHEETS[chave]), XLSX_SHEETS[chave])
+            if problemas is not None:
+                problemas[chave] = relatorio
+    return abas
+
+
+def read_sources(cidades_file=CIDADES_FILE, xlsx_file=BASE_DE_DADOS_XLSX_FILE, compactar=True):
+    """
+    Faz o parsing completo das fontes e retorna o dicionário de DataFrames,
+    com os relatórios de células inválidas de cada fonte em 'problemas'.
+
+    Com `compactar`, as tabelas já vêm nos tipos compactos (ver compact_dtypes.py).
+    """
+    problemas = {}
+    data_sheets = {'cidades': read_cidades(cidades_file, problemas)}
+    data_sheets.update(read_xlsx_sheets(xlsx_file, problemas=problemas))
+    data_sheets['problemas'] = problemas
+    return compact_frames(data_sheets) if compactar else data_sheets
+
+
+def parse_report(data_sheets):
+    """Relatório único das células inválidas de todas as fontes (vazio se não houver)."""
+    relatorios = [r for r in data_sheets.get('problemas', {}).values() if not r.empty]
+    return pd.concat(relatorios, ignore_index=True) if relatorios else empty_report()
+
+
+# --- Impressão digital das fontes ---
+
+def _sha256(caminho):
+    digest = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def source_fingerprint(caminhos):
+    """Tamanho, mtime e hash de cada arquivo de origem."""
+    impressao = {}
+    for caminho in caminhos:
+        info = os.stat(caminho)
+        impressao[caminho] = {"size": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": _sha256(caminho)}
+    return impressao
+
+
+def data_version(impressao):
+    """
+    Identificador curto da versão dos dados, derivado dos hashes das fontes
+    e dos parâmetros com que o GeoJSON é simplificado.
+    """
+    digest = hashlib.sha256()
+    for caminho in sorted(impressao):
+        digest.update(impressao[caminho]["sha256"].encode())
+    digest.update(repr(simplification_parameters()).encode())
+    return digest.hexdigest()[:12]
+
+
+def _fontes_iguais(gravadas, caminhos):
+    """
+    Verifica se as fontes ainda correspondem às usadas no snapshot.
+
+    Tamanho e mtime iguais bastam; se mudaram, o hash decide (um arquivo
+    apenas "tocado" ou recopiado não força a reconstrução).
+    """
+    if set(gravadas) != set(caminhos):
+        return False
+    for caminho in caminhos:
+        info = os.stat(caminho)
+        anterior = gravadas[caminho]
+        if info.st_size == anterior["size"] and info.st_mtime_ns == anterior["mtime_ns"]:
+            continue
+        if info.st_size != anterior["size"] or _sha256(caminho) != anterior["sha256"]:
+            return False
+    return True
+
+
+# --- Snapshot ---
+
+def save_snapshot(data_sheets, impressao, destino=SNAPSHOT_FILE):
+    """Grava o dicionário de DataFrames já carregado, com a impressão digital das fontes usadas."""
+    conteudo = {
+        "schema_version": SNAPSHOT_SCHEMA_VERSION,
+        "fontes": impressao,
+        "criado_em": time.time(),
+        "dados": data_sheets,
+    }
+
+    pasta = os.path.dirname(destino)
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+    # Grava em arquivo temporário e troca atomicamente para não expor snapshot incompleto
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as f:
+        pickle.dump(conteudo, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporario, destino)
+
+
+def _ler_fontes(cidades_file, xlsx_file, geojson_file):
+    """
+    (dicionário de DataFrames com a 'versao', impressão digital das fontes).
+
+    O GeoJSON não vai para o snapshot, mas entra na impressão digital e na versão.
+    """
+    impressao = source_fingerprint([cidades_file, xlsx_file, geojson_file])
+    data_sheets = read_sources(cidades_file, xlsx_file)
+    data_sheets['versao'] = data_version(impressao)
+    return data_sheets, impressao
+
+
+def build_snapshot(destino=SNAPSHOT_FILE, cidades_file=CIDADES_FILE, xlsx_file=BASE_DE_DADOS_XLSX_FILE,
+                   geojson_file=GEOJSON_FILE):
+    """Lê as fontes, grava o snapshot em disco e retorna o dicionário de DataFrames."""
+    data_sheets, impressao = _ler_fontes(cidades_file, xlsx_file, geojson_file)
+    save_snapshot(data_sheets, impressao, destino)
+    return data_sheets
+
+
+def _ler_snapshot(destino):
+    try:
+        with open(destino, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+
+
+def load_snapshot(destino=SNAPSHOT_FILE, cidades_file=CIDADES_FILE, xlsx_file=BASE_DE_DADOS_XLSX_FILE,
+                  geojson_file=GEOJSON_FILE):
+    """
+    Retorna o dicionário de DataFrames a partir do snapshot, com a versão dos
+    dados na chave 'versao'.
+
+    O snapshot é reconstruído quando não existe, está corrompido, foi gerado
+    com outra versão de esquema ou quando alguma fonte mudou. Se não for
+    possível gravá-lo (disco somente leitura), os dados são lidos diretamente
+    das fontes.
+    """
+    conteudo = _ler_snapshot(destino)
+    if (
+        conteudo is not None
+        and conteudo.get("schema_version") == SNAPSHOT_SCHEMA_VERSION
+        and _fontes_iguais(conteudo["fontes"], [cidades_file, xlsx_file, geojson_file])
+    ):
+        data_sheets = conteudo["dados"]
+        # Recalculada porque depende também dos parâmetros de simplificação atuais
+        data_sheets['versao'] = data_version(conteudo["fontes"])
+        return data_sheets
+
+    data_sheets, impressao = _ler_fontes(cidades_file, xlsx_file, geojson_file)
+    try:
+        save_snapshot(data_sheets, impressao, destino)
+    except OSError:
+        # Sem permissão ou disco somente leitura (EROFS): segue com as tabelas já lidas
+        pass
+    return data_sheets
+
+
+def load_all_data(pasta=""):
+    """Dados completos de uma pasta: DataFrames do snapshot mais o GeoJSON simplificado do mapa."""
+    fontes = source_paths(pasta)
+    data_sheets = dict(load_snapshot(fontes['snapshot'], fontes['cidades'], fontes['xlsx'], fontes['geojson']))
+    data_sheets['geojson'] = load_geojson(fontes['geojson'], fontes['geojson_min'])
+    return data_sheets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o snapshot binário dos dados do dashboard.")
+    parser.add_argument("--destino", default=SNAPSHOT_FILE)
+    parser.add_argument("--forcar", action="store_true", help="reconstrói mesmo se as fontes não mudaram")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    if args.forcar:
+        build_snapshot(args.destino)
+    else:
+        load_snapshot(args.destino)
+    print(f"Snapshot pronto em {args.destino} ({time.perf_counter() - inicio:.3f}s)")
+
+    relatorio = parse_report(load_snapshot(args.destino))
+    if not relatorio.empty:
+        print(f"{len(relatorio)} células não puderam ser convertidas (ficaram vazias):")
+        print(relatorio.to_string(index=False))
+
+    inicio = time.perf_counter()
+    load_snapshot(args.destino)
+    print(f"Carga a partir do snapshot: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
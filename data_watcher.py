@@ -0,0 +1,213 @@
+# data_watcher.py
+
+"""
+Recarga a quente das fontes de dados.
+
+Uma thread em segundo plano observa o cidades.csv, cada aba do
+base_de_dados.xlsx e o GeoJSON. Quando algo muda, apenas a fonte afetada é
+lida de novo (no caso do xlsx, só as abas alteradas), a nova versão é
+validada e o cubo de agregações recalculado fora do caminho das
+requisições. Só então a versão nova substitui a anterior, de uma vez; até
+lá, e se a validação falhar, o app continua servindo a versão antiga.
+"""
+
+import os
+import posixpath
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import NamedTuple
+
+import pandas as pd
+
+from aggregations import build_cube
+from compact_dtypes import compact_frames
+from config import *
+from data_snapshot import (
+    XLSX_SHEETS,
+    data_version,
+    load_all_data,
+    read_cidades,
+    read_xlsx_sheets,
+    save_snapshot,
+    source_fingerprint,
+    source_paths,
+)
+from geo_preprocess import load_geojson
+
+NS_PLANILHA = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL_DOC = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_REL_PACOTE = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# Partes do xlsx compartilhadas por todas as abas; se mudarem, todas são relidas
+PARTES_COMUNS_XLSX = ("xl/sharedStrings.xml", "xl/styles.xml", "xl/workbook.xml")
+
+
+class DataVersion(NamedTuple):
+    versao: str
+    dados: dict
+    cubo: dict
+    carregado_em: float  # time.time() da troca
+    duracao: float       # segundos gastos para ler, validar e agregar
+
+
+# --- Detecção de mudanças ---
+
+def _estado_arquivo(caminho):
+    info = os.stat(caminho)
+    return info.st_size, info.st_mtime_ns
+
+
+def xlsx_sheet_checksums(xlsx_file=BASE_DE_DADOS_XLSX_FILE):
+    """
+    CRC de cada aba do workbook, lido do índice do zip (sem descompactar nada
+    além do workbook.xml e das relações).
+
+    Retorna {chave da aba: crc} para as abas de XLSX_SHEETS e, em '_comum',
+    os CRCs das partes compartilhadas (textos, estilos, lista de abas).
+    """
+    with zipfile.ZipFile(xlsx_file) as pacote:
+        crcs = {info.filename: info.CRC for info in pacote.infolist()}
+        workbook = ET.fromstring(pacote.read("xl/workbook.xml"))
+        relacoes = ET.fromstring(pacote.read("xl/_rels/workbook.xml.rels"))
+
+    alvos = {r.get("Id"): r.get("Target") for r in relacoes.iter(f"{NS_REL_PACOTE}Relationship")}
+    partes = {}
+    for aba in workbook.iter(f"{NS_PLANILHA}sheet"):
+        alvo = alvos.get(aba.get(f"{NS_REL_DOC}id"), "")
+        partes[aba.get("name")] = alvo.lstrip("/") if alvo.startswith("/") else posixpath.join("xl", alvo)
+
+    somas = {chave: crcs.get(partes.get(nome)) for chave, nome in XLSX_SHEETS.items()}
+    somas['_comum'] = tuple(crcs.get(parte) for parte in PARTES_COMUNS_XLSX)
+    return somas
+
+
+def validate_data(dados):
+    """Confere se a versão nova tem o mínimo para o app funcionar; levanta ValueError se não tiver."""
+    cidades = dados.get('cidades')
+    if cidades is None or cidades.empty:
+        raise ValueError("cidades.csv está vazio")
+    colunas_numericas = [IDH_COL, PIB_PER_CAPITA_COL, POP_ESTIMADA_COL, HABITANTES_COL,
+                         POP_ATIVA_COL, POP_OCUPADA_COL, RENDA_PER_CAPITA_SM_COL]
+    faltando = [c for c in [CIDADES_MUNICIPIO_COL] + colunas_numericas if c not in cidades.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no cidades.csv: {faltando}")
+    nao_numericas = [c for c in colunas_numericas if not pd.api.types.is_numeric_dtype(cidades[c])]
+    if nao_numericas:
+        raise ValueError(f"Colunas não numéricas no cidades.csv: {nao_numericas}")
+    for chave in XLSX_SHEETS:
+        if not isinstance(dados.get(chave), pd.DataFrame):
+            raise ValueError(f"Aba ausente: {XLSX_SHEETS[chave]}")
+    if not dados.get('geojson', {}).get('features'):
+        raise ValueError("GeoJSON sem municípios")
+
+
+# --- Versão atual e recarga ---
+
+class DataStore:
+    """
+    Mantém a versão atual dos dados e a substitui quando as fontes mudam.
+
+    `current()` é o único ponto de leitura do app; a troca de versão é a
+    atribuição de um único atributo, então uma requisição nunca vê metade
+    de uma versão. `pasta` é a pasta de dados da região (a principal por
+    padrão, ver regions.py).
+    """
+
+    def __init__(self, intervalo=HOT_RELOAD_POLL_SECONDS, pasta=""):
+        self.intervalo = intervalo
+        self.fontes = source_paths(pasta)
+        self.ultimo_erro = None
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+        inicio = time.perf_counter()
+        # Estado anotado antes da leitura: uma fonte alterada durante a carga é relida no primeiro ciclo
+        self._estado = self._estado_fontes()
+        dados = load_all_data(pasta)
+        validate_data(dados)
+        self._atual = DataVersion(dados['versao'], dados, build_cube(dados), time.time(), time.perf_counter() - inicio)
+
+    def current(self):
+        return self._atual
+
+    def _estado_fontes(self, anterior=None):
+        """Estado de cada fonte; o zip do xlsx só é lido quando tamanho/mtime mudaram."""
+        estado = {chave: _estado_arquivo(self.fontes[chave]) for chave in ('cidades', 'geojson', 'xlsx')}
+        if anterior is not None and anterior['xlsx'] == estado['xlsx']:
+            estado['abas'] = anterior['abas']
+        else:
+            estado['abas'] = xlsx_sheet_checksums(self.fontes['xlsx'])
+        return estado
+
+    def check_now(self):
+        """
+        Verifica as fontes e, se algo mudou, recarrega só o que foi afetado.
+
+        Retorna True se uma versão nova foi colocada no ar. Falhas de leitura
+        ou validação ficam em `ultimo_erro` e mantêm a versão anterior.
+        """
+        with self._lock:
+            try:
+                estado = self._estado_fontes(self._estado)
+                if estado == self._estado:
+                    return False
+                inicio = time.perf_counter()
+                dados = self._recarregar(self._estado, estado)
+                validate_data(dados)
+                cubo = build_cube(dados)
+            except Exception as e:
+                # Arquivo ainda sendo gravado, aba renomeada etc.: tenta de novo no próximo ciclo
+                self.ultimo_erro = f"{type(e).__name__}: {e}"
+                return False
+
+            self._estado = estado
+            self._atual = DataVersion(dados['versao'], dados, cubo, time.time(), time.perf_counter() - inicio)
+            self.ultimo_erro = None
+            return True
+
+    def _recarregar(self, anterior, estado):
+        # Impressão digital antes da leitura, como em data_snapshot._ler_fontes: se uma fonte for
+        # regravada durante a leitura, o conteúdo lido nunca recebe o hash do arquivo novo (o tamanho
+        # e o mtime anotados ficam defasados e o próximo ciclo relê a fonte, com outra versão)
+        impressao = source_fingerprint([self.fontes['cidades'], self.fontes['xlsx'], self.fontes['geojson']])
+        dados = dict(self._atual.dados)
+        dados['problemas'] = problemas = dict(dados.get('problemas', {}))
+        if estado['cidades'] != anterior['cidades']:
+            dados['cidades'] = read_cidades(self.fontes['cidades'], problemas)
+        if estado['abas'] != anterior['abas']:
+            if estado['abas']['_comum'] != anterior['abas']['_comum']:
+                alteradas = list(XLSX_SHEETS)
+            else:
+                alteradas = [c for c in XLSX_SHEETS if estado['abas'][c] != anterior['abas'][c]]
+            dados.update(read_xlsx_sheets(self.fontes['xlsx'], alteradas, problemas))
+        if estado['geojson'] != anterior['geojson']:
+            dados['geojson'] = load_geojson(self.fontes['geojson'], self.fontes['geojson_min'])
+        # Tabelas relidas entram no dicionário de municípios compartilhado (recalculado se surgiu um nome novo)
+        compact_frames(dados)
+
+        # Mesma versão que load_snapshot calcula na inicialização
+        dados['versao'] = data_version(impressao)
+        try:
+            # Mantém o snapshot em disco em dia para o próximo processo que subir
+            save_snapshot({k: v for k, v in dados.items() if k != 'geojson'}, impressao, self.fontes['snapshot'])
+        except OSError:
+            pass
+        return dados
+
+    def start(self):
+        """Inicia a thread de observação (uma por processo)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._observar, name="data-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Encerra a thread de observação (região descarregada)."""
+        self._parar.set()
+
+    def _observar(self):
+        while not self._parar.wait(self.intervalo):
+            self.check_now()
@@ -0,0 +1,69 @@
+# figure_cache.py
+
+"""
+Cache de figuras Plotly compartilhado entre sessões.
+
+Como existem poucas seleções possíveis, cada gráfico é construído uma
+única vez por (gráfico, seleção, versão dos dados). O cache tem tamanho
+máximo e descarta a entrada menos usada recentemente (LRU).
+
+Cada entrada guarda só a figura: o `st.plotly_chart` a recebe pronta (sem
+passar de novo pelo Plotly Express) e faz a própria serialização.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from plotly.basedatatypes import BaseFigure
+
+from config import FIGURE_CACHE_MAXSIZE
+
+
+class CachedFigure(NamedTuple):
+    figure: BaseFigure
+
+
+class FigureCache:
+    """Cache LRU thread-safe de figuras, chaveado por (gráfico, seleção, versão)."""
+
+    def __init__(self, maxsize=FIGURE_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chart_id, selecao, versao, builder, *args):
+        """
+        Retorna a CachedFigure de (chart_id, selecao, versao).
+
+        Em caso de falta, chama `builder(*args)`; se ele devolver None (sem
+        dados para a seleção), o None também é guardado e retornado.
+        """
+        chave = (chart_id, selecao, versao)
+        with self._lock:
+            if chave in self._entradas:
+                self._entradas.move_to_end(chave)
+                self.hits += 1
+                return self._entradas[chave]
+            self.misses += 1
+
+        # A construção acontece fora do lock para não bloquear outras sessões;
+        # duas sessões podem construir a mesma figura, e a última prevalece
+        figura = builder(*args)
+        entrada = None if figura is None else CachedFigure(figura)
+
+        with self._lock:
+            self._entradas[chave] = entrada
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.maxsize:
+                self._entradas.popitem(last=False)
+        return entrada
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self):
+        return len(self._entradas)
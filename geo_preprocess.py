@@ -0,0 +1,328 @@
+# geo_preprocess.py
+
+"""
+Pré-processamento da geometria usada no mapa coroplético.
+
+O GeoJSON original do IBGE tem resolução muito maior do que o mapa precisa
+no zoom usado pelo dashboard. Este módulo simplifica os polígonos
+(Douglas-Peucker preservando as divisas entre municípios), arredonda as
+coordenadas e descarta as propriedades que o app não usa, gravando um
+artefato compacto que o `load_all_data` carrega no lugar do original.
+
+O artefato guarda os parâmetros usados na simplificação (membro
+"simplificacao" do FeatureCollection); se eles diferirem da configuração
+atual do config.py, o artefato é regenerado na próxima carga.
+
+Uso pela linha de comando:
+    python geo_preprocess.py                       # gera o artefato com a configuração padrão
+    python geo_preprocess.py --tolerancia 0.001    # testa outra tolerância (o app volta a usar a do config.py)
+    python geo_preprocess.py --comparar 0.0001 0.0005 0.001 0.002
+"""
+
+import argparse
+import json
+import math
+import os
+
+from config import (
+    GEOJSON_FILE,
+    GEOJSON_SIMPLIFIED_FILE,
+    GEO_COORD_DECIMALS,
+    GEO_KEEP_PROPERTIES,
+    GEO_SIMPLIFY_TOLERANCE,
+)
+
+# Aproximação de graus para metros (suficiente para o relatório de fidelidade)
+METROS_POR_GRAU = 111_320
+
+
+# --- Simplificação de linhas ---
+
+def _distancia_ponto_segmento(p, a, b):
+    """Distância (em graus) do ponto p ao segmento a-b."""
+    ax, ay = a
+    bx, by = b
+    px, py = p
+    dx, dy = bx - ax, by - ay
+    if dx == 0 and dy == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def _douglas_peucker(pontos, tolerancia):
+    """Douglas-Peucker iterativo; mantém sempre o primeiro e o último ponto."""
+    if len(pontos) < 3:
+        return list(pontos)
+
+    manter = [False] * len(pontos)
+    manter[0] = manter[-1] = True
+    pilha = [(0, len(pontos) - 1)]
+    while pilha:
+        inicio, fim = pilha.pop()
+        maior_dist, indice = 0.0, None
+        for i in range(inicio + 1, fim):
+            dist = _distancia_ponto_segmento(pontos[i], pontos[inicio], pontos[fim])
+            if dist > maior_dist:
+                maior_dist, indice = dist, i
+        if indice is not None and maior_dist > tolerancia:
+            manter[indice] = True
+            pilha.append((inicio, indice))
+            pilha.append((indice, fim))
+
+    return [p for p, m in zip(pontos, manter) if m]
+
+
+# --- Topologia compartilhada ---
+
+def _aneis(geometria):
+    """Itera sobre todos os anéis (listas de coordenadas) de um Polygon/MultiPolygon."""
+    if geometria["type"] == "Polygon":
+        yield from geometria["coordinates"]
+    elif geometria["type"] == "MultiPolygon":
+        for poligono in geometria["coordinates"]:
+            yield from poligono
+
+
+def _donos_dos_vertices(features):
+    """Mapeia cada vértice para o conjunto de features que o contêm."""
+    donos = {}
+    for indice, feature in enumerate(features):
+        for anel in _aneis(feature["geometry"]):
+            for x, y in anel:
+                donos.setdefault((x, y), set()).add(indice)
+    return donos
+
+
+def _simplificar_anel(anel, tolerancia, donos):
+    """
+    Simplifica um anel fechado sem mover as junções entre municípios.
+
+    Um vértice é fixo quando o conjunto de municípios que o compartilham muda
+    em relação ao vizinho anterior ou seguinte (início/fim de uma divisa).
+    Cada trecho entre vértices fixos é simplificado isoladamente, de modo
+    que a mesma divisa gera o mesmo traçado nos dois municípios vizinhos.
+    """
+    pontos = [tuple(p) for p in anel]
+    if pontos[0] == pontos[-1]:
+        pontos = pontos[:-1]
+    n = len(pontos)
+    if n < 4:
+        return [list(p) for p in pontos + pontos[:1]]
+
+    fixos = [
+        i for i in range(n)
+        if donos[pontos[i]] != donos[pontos[i - 1]] or donos[pontos[i]] != donos[pontos[(i + 1) % n]]
+    ]
+    if not fixos:
+        # Anel sem divisas: ancora no primeiro ponto e no ponto mais distante dele
+        mais_distante = max(range(n), key=lambda i: math.dist(pontos[0], pontos[i]))
+        fixos = [0, mais_distante]
+
+    resultado = []
+    for k, inicio in enumerate(fixos):
+        fim = fixos[(k + 1) % len(fixos)]
+        trecho = pontos[inicio:fim + 1] if fim > inicio else pontos[inicio:] + pontos[:fim + 1]
+        resultado.extend(_douglas_peucker(trecho, tolerancia)[:-1])
+
+    if len(resultado) < 3:
+        return [list(p) for p in pontos + pontos[:1]]
+    resultado.append(resultado[0])
+    return [list(p) for p in resultado]
+
+
+def _arredondar(anel, casas):
+    """Arredonda as coordenadas e remove vértices repetidos gerados pelo arredondamento."""
+    saida = []
+    for x, y in anel:
+        ponto = [round(x, casas), round(y, casas)]
+        if not saida or saida[-1] != ponto:
+            saida.append(ponto)
+    return saida
+
+
+def simplification_parameters(tolerancia=GEO_SIMPLIFY_TOLERANCE, casas=GEO_COORD_DECIMALS,
+                              propriedades=GEO_KEEP_PROPERTIES):
+    """Parâmetros que determinam o artefato, no formato gravado nele."""
+    return {"tolerancia": tolerancia, "casas": casas, "propriedades": list(propriedades)}
+
+
+def simplify_geojson(geojson, tolerancia=GEO_SIMPLIFY_TOLERANCE, casas=GEO_COORD_DECIMALS,
+                     propriedades=GEO_KEEP_PROPERTIES):
+    """
+    Retorna uma cópia simplificada do FeatureCollection.
+
+    `tolerancia` é a distância máxima (em graus) entre o traçado original e o
+    simplificado; `casas` é o número de casas decimais mantidas nas
+    coordenadas; `propriedades` são as chaves de `properties` preservadas.
+    """
+    features = geojson["features"]
+    donos = _donos_dos_vertices(features)
+
+    def simplificar(anel):
+        return _arredondar(_simplificar_anel(anel, tolerancia, donos), casas)
+
+    novas_features = []
+    for feature in features:
+        geometria = feature["geometry"]
+        if geometria["type"] == "Polygon":
+            coordenadas = [simplificar(anel) for anel in geometria["coordinates"]]
+        elif geometria["type"] == "MultiPolygon":
+            coordenadas = [[simplificar(anel) for anel in poligono] for poligono in geometria["coordinates"]]
+        else:
+            coordenadas = geometria["coordinates"]
+        novas_features.append({
+            "type": "Feature",
+            "properties": {k: feature["properties"].get(k) for k in propriedades},
+            "geometry": {"type": geometria["type"], "coordinates": coordenadas},
+        })
+
+    saida = {"type": "FeatureCollection", "features": novas_features}
+    if "crs" in geojson:
+        saida["crs"] = geojson["crs"]
+    saida["simplificacao"] = simplification_parameters(tolerancia, casas, propriedades)
+    return saida
+
+
+def dumps_compact(geojson):
+    """Serializa o GeoJSON sem espaços (formato do artefato gravado em disco)."""
+    return json.dumps(geojson, ensure_ascii=False, separators=(",", ":"))
+
+
+# --- Relatório de tamanho/fidelidade ---
+
+def _area_anel(anel):
+    """Área (fórmula do laço) em graus², sem sinal."""
+    return abs(sum(x1 * y2 - x2 * y1 for (x1, y1), (x2, y2) in zip(anel, anel[1:]))) / 2
+
+
+def _area_geometria(geometria):
+    if geometria["type"] == "Polygon":
+        poligonos = [geometria["coordinates"]]
+    elif geometria["type"] == "MultiPolygon":
+        poligonos = geometria["coordinates"]
+    else:
+        return 0.0
+    # O primeiro anel é o contorno externo; os demais são buracos
+    return sum(_area_anel(p[0]) - sum(_area_anel(b) for b in p[1:]) for p in poligonos)
+
+
+def _contar_vertices(geojson):
+    return sum(len(anel) for f in geojson["features"] for anel in _aneis(f["geometry"]))
+
+
+def fidelity_report(original, simplificado, tolerancia):
+    """
+    Compara o GeoJSON original com o simplificado.
+
+    Retorna um dicionário com tamanhos (bytes do JSON compacto), número de
+    vértices, erro máximo de traçado em metros e a variação de área por
+    município, usado para escolher a tolerância.
+    """
+    bytes_original = len(dumps_compact(original).encode("utf-8"))
+    bytes_simplificado = len(dumps_compact(simplificado).encode("utf-8"))
+
+    variacao_area = {}
+    for f_orig, f_simp in zip(original["features"], simplificado["features"]):
+        area_orig = _area_geometria(f_orig["geometry"])
+        area_simp = _area_geometria(f_simp["geometry"])
+        nome = f_orig["properties"].get("NM_MUN")
+        variacao_area[nome] = 100 * abs(area_simp - area_orig) / area_orig if area_orig else 0.0
+
+    return {
+        "tolerancia_graus": tolerancia,
+        "erro_max_metros": round(tolerancia * METROS_POR_GRAU, 1),
+        "bytes_original": bytes_original,
+        "bytes_simplificado": bytes_simplificado,
+        "reducao": round(bytes_original / bytes_simplificado, 1) if bytes_simplificado else None,
+        "vertices_original": _contar_vertices(original),
+        "vertices_simplificado": _contar_vertices(simplificado),
+        "variacao_area_max_pct": round(max(variacao_area.values(), default=0.0), 3),
+        "variacao_area_pct": {k: round(v, 3) for k, v in variacao_area.items()},
+    }
+
+
+def _imprimir_relatorio(relatorio):
+    print(
+        f"tolerância {relatorio['tolerancia_graus']:g}° (~{relatorio['erro_max_metros']:g} m): "
+        f"{relatorio['bytes_original'] / 1024:,.0f} KB -> {relatorio['bytes_simplificado'] / 1024:,.1f} KB "
+        f"({relatorio['reducao']}x), vértices {relatorio['vertices_original']} -> {relatorio['vertices_simplificado']}, "
+        f"variação de área máx. {relatorio['variacao_area_max_pct']:.3f}%"
+    )
+
+
+# --- Geração e carregamento do artefato ---
+
+def build_simplified_geojson(origem=GEOJSON_FILE, destino=GEOJSON_SIMPLIFIED_FILE,
+                             tolerancia=GEO_SIMPLIFY_TOLERANCE, casas=GEO_COORD_DECIMALS):
+    """Gera o artefato compacto em disco e retorna (geojson_simplificado, relatório)."""
+    with open(origem, "r", encoding="utf-8") as f:
+        original = json.load(f)
+    simplificado = simplify_geojson(original, tolerancia, casas)
+
+    # Grava em arquivo temporário e troca atomicamente para não expor artefato incompleto
+    temporario = f"{destino}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(dumps_compact(simplificado))
+    os.replace(temporario, destino)
+
+    return simplificado, fidelity_report(original, simplificado, tolerancia)
+
+
+def load_geojson(origem=GEOJSON_FILE, destino=GEOJSON_SIMPLIFIED_FILE):
+    """
+    Carrega o GeoJSON compacto usado pelo mapa.
+
+    Se o artefato não existir, for mais antigo que o arquivo original ou
+    tiver sido gerado com outros parâmetros de simplificação, ele é
+    regenerado antes de ser carregado. Em ambientes somente leitura a versão
+    simplificada é calculada em memória.
+    """
+    if os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(origem):
+        try:
+            with open(destino, "r", encoding="utf-8") as f:
+                simplificado = json.load(f)
+        except (OSError, ValueError):
+            simplificado = None
+        if simplificado is not None and simplificado.get("simplificacao") == simplification_parameters():
+            return simplificado
+
+    try:
+        simplificado, _ = build_simplified_geojson(origem, destino)
+    except OSError:
+        with open(origem, "r", encoding="utf-8") as f:
+            simplificado = simplify_geojson(json.load(f))
+    return simplificado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simplifica o GeoJSON dos municípios para o mapa do dashboard.")
+    parser.add_argument("--origem", default=GEOJSON_FILE)
+    parser.add_argument("--destino", default=GEOJSON_SIMPLIFIED_FILE)
+    parser.add_argument("--tolerancia", type=float, default=GEO_SIMPLIFY_TOLERANCE,
+                        help="distância máxima de simplificação, em graus")
+    parser.add_argument("--casas", type=int, default=GEO_COORD_DECIMALS,
+                        help="casas decimais mantidas nas coordenadas")
+    parser.add_argument("--comparar", type=float, nargs="+", metavar="TOL",
+                        help="apenas imprime o relatório para várias tolerâncias, sem gravar o artefato")
+    parser.add_argument("--json", action="store_true", help="imprime o relatório completo em JSON")
+    args = parser.parse_args()
+
+    if args.comparar:
+        with open(args.origem, "r", encoding="utf-8") as f:
+            original = json.load(f)
+        for tolerancia in args.comparar:
+            relatorio = fidelity_report(original, simplify_geojson(original, tolerancia, args.casas), tolerancia)
+            print(json.dumps(relatorio, ensure_ascii=False)) if args.json else _imprimir_relatorio(relatorio)
+        return
+
+    _, relatorio = build_simplified_geojson(args.origem, args.destino, args.tolerancia, args.casas)
+    if args.json:
+        print(json.dumps(relatorio, ensure_ascii=False, indent=2))
+    else:
+        _imprimir_relatorio(relatorio)
+        print(f"Artefato gravado em {args.destino}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# instrumentation.py
+
+"""
+Instrumentação de latência do dashboard.
+
+Cada etapa nomeada de uma execução do app (carga dos dados, seções,
+construção de cada figura, envio de cada gráfico pelo st.plotly_chart) é
+cronometrada com `etapa(...)`, junto com o tamanho do payload de cada
+gráfico. Os registros de todas as sessões vão para um único agregador por
+processo, que calcula p50/p95 por etapa e exporta tudo em JSON lines.
+
+O painel de perfil do app é aberto com o parâmetro `?perfil=1` na URL.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from config import PROFILE_LOG_FILE, PROFILE_MAX_RECORDS
+
+
+def _percentil(valores_ordenados, p):
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not valores_ordenados:
+        return None
+    indice = max(0, math.ceil(p / 100 * len(valores_ordenados)) - 1)
+    return valores_ordenados[indice]
+
+
+class Instrumentation:
+    """Agregador de registros de tempo, thread-safe e compartilhado entre sessões."""
+
+    def __init__(self, max_registros=PROFILE_MAX_RECORDS, arquivo=PROFILE_LOG_FILE):
+        self.arquivo = arquivo
+        self._registros = deque(maxlen=max_registros)
+        self._lock = threading.Lock()
+
+    def registrar(self, nome, ms, sessao=None, bytes=None):
+        """Guarda um registro e, se configurado, acrescenta-o ao arquivo JSON lines."""
+        registro = {"ts": round(time.time(), 3), "sessao": sessao, "etapa": nome, "ms": round(ms, 3)}
+        if bytes is not None:
+            registro["bytes"] = bytes
+        with self._lock:
+            self._registros.append(registro)
+            if self.arquivo:
+                with open(self.arquivo, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    @contextmanager
+    def etapa(self, nome, sessao=None):
+        """
+        Cronometra o bloco como a etapa `nome`.
+
+        O dicionário retornado pelo `with` aceita a chave 'bytes' para
+        registrar o tamanho do payload produzido pela etapa.
+        """
+        extra = {}
+        inicio = time.perf_counter()
+        try:
+            yield extra
+        finally:
+            self.registrar(nome, (time.perf_counter() - inicio) * 1000, sessao, extra.get("bytes"))
+
+    def registros(self):
+        with self._lock:
+            return list(self._registros)
+
+    def resumo(self):
+        """Uma linha por etapa: nº de medições, p50/p95/máx em ms e p50 do payload em bytes."""
+        por_etapa = {}
+        for registro in self.registros():
+            por_etapa.setdefault(registro["etapa"], []).append(registro)
+
+        linhas = []
+        for nome, registros in sorted(por_etapa.items()):
+            tempos = sorted(r["ms"] for r in registros)
+            tamanhos = sorted(r["bytes"] for r in registros if "bytes" in r)
+            linhas.append({
+                "etapa": nome,
+                "n": len(registros),
+                "p50_ms": _percentil(tempos, 50),
+                "p95_ms": _percentil(tempos, 95),
+                "max_ms": tempos[-1],
+                "sessoes": len({r["sessao"] for r in registros}),
+                "bytes_p50": _percentil(tamanhos, 50),
+            })
+        return linhas
+
+    def to_jsonl(self):
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in self.registros())
+
+    def clear(self):
+        with self._lock:
+            self._registros.clear()
@@ -0,0 +1,159 @@
+# regions.py
+
+"""
+Dados de várias regiões, carregados sob demanda.
+
+Cada região é uma pasta com os mesmos três arquivos de origem do dashboard
+(cidades.csv, base_de_dados.xlsx e o GeoJSON): a pasta principal é a
+região DEFAULT_REGION e cada subpasta de REGIONS_DIR é uma região a mais,
+com o nome da pasta:
+
+    regioes/
+        Central Serrana/
+            cidades.csv
+            base_de_dados.xlsx
+            municipios_caparao.geojson
+        Noroeste/
+            ...
+
+Uma região só é lida quando alguém a seleciona. As regiões carregadas
+ficam em memória (cada uma com o seu DataStore e a recarga a quente de
+data_watcher.py) até que o total estimado passe de REGION_MEMORY_BUDGET_MB;
+aí as usadas há mais tempo são descarregadas.
+
+Para ver o consumo estimado de cada região:
+    python regions.py
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from config import *
+from data_snapshot import source_paths
+from data_watcher import DataStore
+
+# Aproximação da memória de um vértice do GeoJSON carregado (lista com dois floats do Python)
+BYTES_POR_VERTICE = 136
+
+
+def discover_regions(raiz=""):
+    """{nome da região: pasta}; a região padrão primeiro, as demais em ordem alfabética."""
+    outras = {}
+    pasta_regioes = os.path.join(raiz, REGIONS_DIR)
+    if os.path.isdir(pasta_regioes):
+        for nome in sorted(os.listdir(pasta_regioes)):
+            pasta = os.path.join(pasta_regioes, nome)
+            if os.path.isfile(os.path.join(pasta, CIDADES_FILE)):
+                outras[nome] = pasta
+    # Sem outras regiões a padrão sempre aparece, para que a falta de arquivos seja reportada ao carregar
+    if os.path.exists(source_paths(raiz)['cidades']) or not outras:
+        return {DEFAULT_REGION: raiz, **outras}
+    return outras
+
+
+def _contar_vertices(geojson):
+    total = 0
+    for feature in geojson.get("features", []):
+        geometria = feature["geometry"]
+        poligonos = geometria["coordinates"] if geometria["type"] == "MultiPolygon" else [geometria["coordinates"]]
+        total += sum(len(anel) for poligono in poligonos for anel in poligono)
+    return total
+
+
+def memory_usage(carga):
+    """Memória estimada (bytes) das tabelas e do GeoJSON de uma DataVersion (as visões do cubo são pequenas)."""
+    total = 0
+    for valor in carga.dados.values():
+        if isinstance(valor, pd.DataFrame):
+            total += int(valor.memory_usage(index=True, deep=True).sum())
+    total += _contar_vertices(carga.dados.get('geojson', {})) * BYTES_POR_VERTICE
+    return total
+
+
+class RegionRegistry:
+    """
+    Regiões disponíveis e as carregadas no momento, com descarte por LRU.
+
+    `current(regiao)` é o ponto de leitura do app: carrega a região na
+    primeira vez e devolve a DataVersion atual dela.
+    """
+
+    def __init__(self, orcamento_mb=REGION_MEMORY_BUDGET_MB, raiz="", observar=True):
+        self.orcamento = orcamento_mb * 1024 * 1024
+        self.observar = observar
+        self.regioes = discover_regions(raiz)
+        self._carregadas = OrderedDict()  # nome -> DataStore, da usada há mais tempo para a mais recente
+        self._tamanhos = {}               # (nome, versão) -> bytes estimados
+        self._lock = threading.Lock()
+        self._travas_carga = {nome: threading.Lock() for nome in self.regioes}
+
+    def names(self):
+        return list(self.regioes)
+
+    def store(self, regiao):
+        """DataStore da região, carregando-a se preciso. KeyError se a região não existe."""
+        pasta = self.regioes[regiao]
+        with self._lock:
+            store = self._carregadas.get(regiao)
+            if store is not None:
+                self._carregadas.move_to_end(regiao)
+                return store
+
+        # Regiões diferentes podem ser lidas em paralelo; a mesma região, só uma vez
+        with self._travas_carga[regiao]:
+            with self._lock:
+                store = self._carregadas.get(regiao)
+            if store is None:
+                store = DataStore(pasta=pasta)
+                if self.observar:
+                    store.start()
+                with self._lock:
+                    self._carregadas[regiao] = store
+                    self._descartar_excedente(manter=regiao)
+        return store
+
+    def current(self, regiao):
+        return self.store(regiao).current()
+
+    def _tamanho(self, regiao, store):
+        carga = store.current()
+        chave = (regiao, carga.versao)
+        if chave not in self._tamanhos:
+            self._tamanhos = {k: v for k, v in self._tamanhos.items() if k[0] != regiao}
+            self._tamanhos[chave] = memory_usage(carga)
+        return self._tamanhos[chave]
+
+    def _descartar_excedente(self, manter):
+        total = sum(self._tamanho(nome, store) for nome, store in self._carregadas.items())
+        for nome in list(self._carregadas):
+            if total <= self.orcamento:
+                break
+            if nome == manter:
+                continue
+            store = self._carregadas.pop(nome)
+            store.stop()
+            total -= self._tamanhos.get((nome, store.current().versao), 0)
+            # Sessões que ainda têm a DataVersion em mãos continuam funcionando até a próxima consulta
+
+    def loaded(self):
+        """[(região, versão, MB estimados)] das regiões em memória, da usada há mais tempo para a mais recente."""
+        with self._lock:
+            return [
+                (nome, store.current().versao, self._tamanho(nome, store) / (1024 * 1024))
+                for nome, store in self._carregadas.items()
+            ]
+
+
+def main():
+    registro = RegionRegistry(orcamento_mb=float("inf"), observar=False)
+    for nome in registro.names():
+        registro.store(nome)
+    for nome, versao, mb in registro.loaded():
+        print(f"{nome:<30} versão {versao}  {mb:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# shared_store.py
+
+"""
+Armazenamento compartilhado entre processos para implantações com várias
+réplicas do Streamlit na mesma máquina.
+
+Os dados carregados (DataFrames e GeoJSON) e o cubo de agregações são
+gravados em um único arquivo em memória compartilhada (/dev/shm quando
+existe). Os arrays numéricos vão fora da área do pickle (pickle protocolo 5
+com buffers "out-of-band"), então cada réplica mapeia o arquivo somente
+leitura e os DataFrames apontam direto para as mesmas páginas de memória:
+o consumo não cresce com o número de réplicas e uma réplica nova sobe já
+com os dados prontos.
+
+Um coordenador local é dono das atualizações: ele publica a primeira versão,
+observa as fontes (com a mesma recarga por fonte do data_watcher.py) e
+publica uma nova versão quando algo muda. As réplicas apenas se conectam à
+versão atual.
+
+Uso:
+    python shared_store.py coordenar          # em um processo à parte, antes das réplicas
+    DASHBOARD_SHARED_STORE=1 streamlit run app.py --server.port 8501
+    DASHBOARD_SHARED_STORE=1 streamlit run app.py --server.port 8502
+
+Sem coordenador rodando, a primeira réplica publica a versão atual sozinha.
+Cada região (ver regions.py) é publicada e coordenada à parte:
+
+    python shared_store.py coordenar --regiao "Central Serrana"
+"""
+
+import argparse
+import json
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from config import (
+    DEFAULT_REGION,
+    SHARED_STORE_DIR,
+    SHARED_STORE_KEEP_VERSIONS,
+    SHARED_STORE_POLL_SECONDS,
+    SHARED_STORE_WAIT_SECONDS,
+)
+from data_watcher import DataStore
+from regions import discover_regions
+
+MAGIC = b"CAPARAO1"
+ALINHAMENTO = 64
+ARQUIVO_ATUAL = "ATUAL"
+ARQUIVO_LOCK = "coordenador.lock"
+
+
+def shared_mode_enabled():
+    """O modo compartilhado é ligado pela variável de ambiente DASHBOARD_SHARED_STORE=1."""
+    return os.environ.get("DASHBOARD_SHARED_STORE") == "1"
+
+
+def store_dir():
+    """Pasta do armazenamento: variável de ambiente, config.py, /dev/shm ou pasta temporária."""
+    pasta = os.environ.get("DASHBOARD_SHARED_STORE_DIR") or SHARED_STORE_DIR
+    if not pasta:
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+        pasta = os.path.join(base, "dashboard-caparao")
+    os.makedirs(pasta, exist_ok=True)
+    return pasta
+
+
+# --- Escrita/leitura do arquivo compartilhado ---
+# Formato: MAGIC | tamanho do cabeçalho (uint64) | cabeçalho JSON | buffers alinhados | pickle
+
+def _alinhar(n):
+    return (n + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+def _gravar_store(caminho, conteudo):
+    buffers = []
+    corpo = pickle.dumps(conteudo, protocol=5, buffer_callback=buffers.append)
+    visoes = [b.raw() for b in buffers]
+
+    # As posições dependem do tamanho do cabeçalho, que reservamos com folga
+    reserva = _alinhar(len(MAGIC) + 8 + 64 * (len(visoes) + 4) + 256)
+    posicao, indice = reserva, []
+    for v in visoes:
+        indice.append([posicao, v.nbytes])
+        posicao = _alinhar(posicao + v.nbytes)
+    cabecalho = json.dumps({"buffers": indice, "pickle": [posicao, len(corpo)]}).encode()
+    assert len(MAGIC) + 8 + len(cabecalho) <= reserva
+
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(cabecalho)) + cabecalho)
+        for (inicio, _), v in zip(indice, visoes):
+            f.seek(inicio)
+            f.write(v)
+        f.seek(posicao)
+        f.write(corpo)
+    os.replace(temporario, caminho)
+
+
+def _abrir_store(caminho):
+    with open(caminho, "rb") as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    visao = memoryview(mapa)
+    if bytes(visao[:len(MAGIC)]) != MAGIC:
+        raise ValueError(f"Arquivo compartilhado inválido: {caminho}")
+    (tamanho,) = struct.unpack("<Q", visao[len(MAGIC):len(MAGIC) + 8])
+    cabecalho = json.loads(bytes(visao[len(MAGIC) + 8:len(MAGIC) + 8 + tamanho]))
+    buffers = [visao[inicio:inicio + n] for inicio, n in cabecalho["buffers"]]
+    inicio, n = cabecalho["pickle"]
+    # Os arrays numéricos passam a apontar para o mapa (somente leitura), sem cópia
+    return pickle.loads(visao[inicio:inicio + n], buffers=buffers)
+
+
+# --- Publicação ---
+
+def _arquivo_da_regiao(base, regiao):
+    """Ponteiro/trava de uma região; a região padrão mantém os nomes sem sufixo."""
+    return base if regiao == DEFAULT_REGION else f"{base}-{regiao}"
+
+
+def _tentar_travar(arquivo):
+    try:
+        if fcntl is not None:
+            fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def current_version(pasta=None, regiao=DEFAULT_REGION):
+    """Versão publicada atualmente para a região, ou None se nada foi publicado."""
+    try:
+        with open(os.path.join(pasta or store_dir(), _arquivo_da_regiao(ARQUIVO_ATUAL, regiao)), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def publish(pasta=None, carga=None, regiao=DEFAULT_REGION):
+    """
+    Publica uma DataVersion (por padrão, a carregada agora das fontes da
+    região) como a versão atual da região. Retorna a versão.
+    """
+    pasta = pasta or store_dir()
+    carga = carga or DataStore(pasta=discover_regions()[regiao]).current()
+    versao = carga.versao
+
+    caminho = os.path.join(pasta, f"store-{versao}.bin")
+    if not os.path.exists(caminho):
+        # O cubo calcula as visões na primeira consulta; sem isso cada réplica calcularia e guardaria as suas
+        carga.cubo.materialize()
+        _gravar_store(caminho, carga._asdict())
+
+    ponteiro = _arquivo_da_regiao(ARQUIVO_ATUAL, regiao)
+    temporario = os.path.join(pasta, f"{ponteiro}.{os.getpid()}.tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(versao)
+    os.replace(temporario, os.path.join(pasta, ponteiro))
+    _remover_versoes_antigas(pasta)
+    return versao
+
+
+def _remover_versoes_antigas(pasta):
+    # Réplicas que ainda mapeiam uma versão removida continuam lendo o conteúdo
+    # até se reconectarem (o arquivo só some de fato quando o último mapa fecha)
+    atuais = set()
+    for nome in os.listdir(pasta):
+        if nome == ARQUIVO_ATUAL or (nome.startswith(f"{ARQUIVO_ATUAL}-") and not nome.endswith(".tmp")):
+            with open(os.path.join(pasta, nome), "r", encoding="utf-8") as f:
+                atuais.add(f"store-{f.read().strip()}.bin")
+    arquivos = sorted(
+        (os.path.join(pasta, nome) for nome in os.listdir(pasta) if nome.startswith("store-") and nome.endswith(".bin")),
+        key=os.path.getmtime, reverse=True,
+    )
+    # As versões atuais de todas as regiões ficam; das demais, as mais recentes
+    antigos = [a for a in arquivos if os.path.basename(a) not in atuais][SHARED_STORE_KEEP_VERSIONS - 1:]
+    for caminho in antigos:
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass  # no Windows arquivos mapeados não podem ser removidos
+
+
+def ensure_published(pasta=None, regiao=DEFAULT_REGION):
+    """
+    Garante que exista uma versão publicada da região e retorna essa versão.
+
+    Se ainda não houver nenhuma e nenhum coordenador da região estiver
+    ativo, esta réplica publica a versão atual; caso contrário aguarda o
+    coordenador. Se o coordenador terminar sem publicar, a trava fica livre
+    e a réplica publica sozinha. Levanta TimeoutError se nada for publicado
+    em SHARED_STORE_WAIT_SECONDS.
+    """
+    pasta = pasta or store_dir()
+    versao = current_version(pasta, regiao)
+    if versao is not None:
+        return versao
+
+    caminho_trava = os.path.join(pasta, _arquivo_da_regiao(ARQUIVO_LOCK, regiao))
+    prazo = time.monotonic() + SHARED_STORE_WAIT_SECONDS
+    while True:
+        with open(caminho_trava, "a+b") as trava:
+            if _tentar_travar(trava):
+                # Quem tinha a trava pode ter publicado logo antes de soltá-la
+                return current_version(pasta, regiao) or publish(pasta, regiao=regiao)
+        if time.monotonic() > prazo:
+            raise TimeoutError(
+                f"Nenhuma versão dos dados de {regiao} foi publicada em {SHARED_STORE_WAIT_SECONDS} s "
+                f"(o coordenador que detém {caminho_trava} não publicou)"
+            )
+        time.sleep(0.1)
+        versao = current_version(pasta, regiao)
+        if versao is not None:
+            return versao
+
+
+def attach(versao, pasta=None):
+    """Conecta-se (somente leitura) à versão publicada e retorna os campos de uma DataVersion em um dicionário."""
+    return _abrir_store(os.path.join(pasta or store_dir(), f"store-{versao}.bin"))
+
+
+# --- Coordenador ---
+
+def coordinate(intervalo=SHARED_STORE_POLL_SECONDS, pasta=None, regiao=DEFAULT_REGION):
+    """Publica a versão atual da região e republica sempre que as fontes mudarem. Não retorna."""
+    pasta = pasta or store_dir()
+    with open(os.path.join(pasta, _arquivo_da_regiao(ARQUIVO_LOCK, regiao)), "a+b") as trava:
+        if not _tentar_travar(trava):
+            raise SystemExit(f"Já existe um coordenador ativo para {regiao} em {pasta}")
+
+        store = DataStore(intervalo, pasta=discover_regions()[regiao])
+        versao = publish(pasta, store.current(), regiao)
+        print(f"Versão {versao} de {regiao} publicada em {pasta}", flush=True)
+        while True:
+            time.sleep(intervalo)
+            if store.check_now():
+                versao = publish(pasta, store.current(), regiao)
+                print(f"Fontes alteradas: versão {versao} publicada", flush=True)
+            elif store.ultimo_erro:
+                print(f"Falha ao recarregar (mantida a versão {versao}): {store.ultimo_erro}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Armazenamento compartilhado entre réplicas do dashboard.")
+    sub = parser.add_subparsers(dest="comando", required=True)
+    coordenar = sub.add_parser("coordenar", help="publica os dados e acompanha mudanças nas fontes")
+    coordenar.add_argument("--intervalo", type=float, default=SHARED_STORE_POLL_SECONDS)
+    publicar = sub.add_parser("publicar", help="publica a versão atual uma vez e sai")
+    sub.add_parser("status", help="mostra a versão publicada de cada região")
+    for comando in (coordenar, publicar):
+        comando.add_argument("--regiao", default=DEFAULT_REGION)
+    args = parser.parse_args()
+
+    if args.comando == "coordenar":
+        coordinate(args.intervalo, regiao=args.regiao)
+    elif args.comando == "publicar":
+        print(publish(regiao=args.regiao))
+    else:
+        for regiao in discover_regions():
+            print(f"{store_dir()}: {regiao} versão {current_version(regiao=regiao) or '(nenhuma)'}")
+
+
+if __name__ == "__main__":
+    main()
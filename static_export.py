@@ -0,0 +1,274 @@
+# static_export.py
+
+"""
+Exportação estática do dashboard.
+
+Gera, para cada região, uma página HTML e um pacote JSON por visão ("Visão
+Regional" e cada município), a partir dos mesmos dados (regions.py), do
+mesmo cubo de agregações (aggregations.py) e das mesmas definições de
+gráficos e cartões (charts.py) do app. O resultado pode ser servido por
+qualquer servidor de arquivos estáticos, sem processo Python:
+
+    dist/
+        index.html                         lista das regiões
+        assets/plotly-<versão>.min.js      Plotly.js, um único arquivo para todas as páginas
+        <região>/
+            index.html, <município>.html   páginas (KPIs e cartões já em HTML)
+            visao-<visão>-<dados>.json     pacote da visão: KPIs, cartões e figuras
+            mapa-<dados>.json              figura do mapa, comum a todas as páginas da região
+            geo-<dados>.json               geometria, referenciada pelo mapa por URL
+
+Os arquivos JSON levam a versão dos dados no nome, então podem ser
+servidos com cache longo; as páginas HTML apontam sempre para os atuais.
+As páginas usam fetch, então precisam ser abertas por um servidor HTTP
+(ex.: `python -m http.server -d dist`), não direto do disco.
+
+Uso:
+    python static_export.py                        # todas as regiões em dist/
+    python static_export.py --saida publico --regiao Caparaó
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import time
+import unicodedata
+
+import plotly
+from plotly.offline import get_plotlyjs
+
+from charts import (
+    CHARTS,
+    INDICADOR_CARDS,
+    KPI_CARDS,
+    build_map_figure,
+    indicador_card_html,
+    kpi_card_html,
+    region_title,
+    zonas_urbana_rural,
+)
+from config import *
+from geo_preprocess import dumps_compact
+from regions import RegionRegistry
+
+# Seções da página, na ordem do app: (título, [(id do gráfico, subtítulo, aviso sem dados)], com os cartões de instituições)
+SECOES = [
+    ("Economia e Mercado de Trabalho", [
+        ('empregos_setor', "Empregos por Setor", "Não há dados de empregos por setor para a seleção atual."),
+        ('empregos_faixa', "Empregos por Faixa Etária", "Não há dados de empregos por faixa etária para a seleção atual."),
+    ], False),
+    ("Empresas e Empreendedorismo", [
+        ('empresas_porte', "Empresas por Porte", "Não há dados de empresas para a seleção atual."),
+    ], True),
+    ("Educação", [
+        ('escolas_rede', "Escolas por Rede de Ensino", "Não há dados de escolas por rede para a seleção atual."),
+        ('ideb', "IDEB Médio", "Não há dados de IDEB para a seleção atual."),
+        ('inst_nivel', "Instituições por Nível", "Não há dados de instituições por nível para a seleção atual."),
+    ], False),
+    ("Instituições Gerais", [
+        ('instituicoes_categoria', "Instituições por Categoria", "Não há dados de instituições para a seleção atual."),
+    ], False),
+]
+
+ESTILO = """
+body { font-family: sans-serif; max-width: 1200px; margin: 0 auto; padding: 1em; }
+h1, h2, h3, h4 { text-align: center; }
+.linha { display: flex; gap: 1em; align-items: stretch; }
+.linha > * { flex: 1; min-width: 0; }
+.grafico { min-height: 420px; }
+.aviso { background: #fff3cd; color: #664d03; padding: 1em; border-radius: 8px; }
+nav { text-align: center; margin: 1em 0; }
+"""
+
+
+def slugify(nome):
+    """Nome de arquivo ASCII para uma região ou município ("Iúna" -> "iuna")."""
+    ascii_ = unicodedata.normalize("NFKD", nome).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "-", ascii_.lower()).strip("-") or "visao"
+
+
+def _pagina(visao):
+    return "index.html" if visao == REGIONAL_VIEW else f"{slugify(visao)}.html"
+
+
+def _gravar(caminho, conteudo):
+    with open(caminho, "w", encoding="utf-8") as f:
+        f.write(conteudo)
+    return len(conteudo.encode("utf-8"))
+
+
+# --- Pacotes JSON ---
+
+def view_bundle(carga, visao):
+    """Pacote de uma visão: os mesmos KPIs, cartões e figuras que o app mostra para ela."""
+    dados = carga.cubo[visao]
+    figuras = {}
+    for chart_id, builder in CHARTS.items():
+        figura = builder(dados)
+        figuras[chart_id] = None if figura is None else json.loads(figura.to_json())
+    zona_urbana, zona_rural = zonas_urbana_rural(dados['geo']) if not dados['geo'].empty else (None, None)
+    return {
+        "visao": visao,
+        "versao": carga.versao,
+        "kpis": dados['kpis'],
+        "zonas": {"urbana": zona_urbana, "rural": zona_rural},
+        "inst_cards": dados['inst_cards'],
+        "figuras": figuras,
+    }
+
+
+def map_figure_json(carga, url_geometria):
+    """Figura do mapa com a geometria trocada pela URL do arquivo compartilhado (o Plotly.js a busca sozinho)."""
+    figura = json.loads(build_map_figure(carga.dados['cidades'], carga.dados['geojson']).to_json())
+    for trace in figura["data"]:
+        trace["geojson"] = url_geometria
+    return figura
+
+
+# --- Páginas HTML ---
+
+def _html_kpis(kpis):
+    linhas = []
+    for linha in (KPI_CARDS[:4], KPI_CARDS[4:]):
+        cartoes = "".join(kpi_card_html(titulo, formato.format(kpis[chave]), emoji, cor) for titulo, chave, formato, emoji, cor in linha)
+        linhas.append(f"<div class='linha'>{cartoes}</div>")
+    return "".join(linhas)
+
+
+def _html_grafico(chart_id, subtitulo, aviso, pacote):
+    conteudo = (f"<div class='grafico' id='{chart_id}'></div>" if pacote["figuras"][chart_id] is not None
+                else f"<div class='aviso'>{html.escape(aviso)}</div>")
+    cabecalho = f"<h4>{html.escape(subtitulo)}</h4>" if subtitulo else ""
+    return f"<div>{cabecalho}{conteudo}</div>"
+
+
+def render_page(regiao, visoes, visao, pacote, arquivos, plotly_js):
+    """Página de uma visão. KPIs e cartões vão prontos no HTML; os gráficos vêm do pacote JSON."""
+    titulo = region_title(regiao) if visao == REGIONAL_VIEW else f"Resumo de {visao}"
+    opcoes = "".join(
+        f"<option value='{_pagina(v)}'{' selected' if v == visao else ''}>{html.escape(v)}</option>" for v in visoes
+    )
+    partes = [
+        "<h1 style='color: #0dcaf0;'>Dashboard Gênesis Caparaó</h1>",
+        f"<p style='text-align:center; color: grey; font-size: 12px;'>Dados: versão {pacote['versao']} · exportado em {time.strftime('%d/%m/%Y %H:%M:%S')}</p>",
+        "<h2>Mapa Interativo e Filtro Municipal</h2><div class='grafico' id='mapa'></div>",
+        f"<nav><select onchange='location.href=this.value'>{opcoes}</select> · <a href='../index.html'>Regiões</a></nav>",
+        f"<hr><h2>{html.escape(titulo)}</h2>",
+    ]
+    if pacote["kpis"]:
+        partes.append(_html_kpis(pacote["kpis"]))
+    if pacote["zonas"]["urbana"] is not None:
+        zonas = pacote["zonas"]
+        partes.append(
+            "<hr><h3>Concentração Geográfica</h3>"
+            + _html_grafico('geo_pizza', "", "Não há dados geográficos para a seleção atual.", pacote)
+            + "<div class='linha' style='text-align:center;'>"
+            f"<div>🏙️ <b>ZONA URBANA</b><h3 style='color:#1f77b4;'>{zonas['urbana']:.2f}%</h3></div>"
+            f"<div>🏡 <b>ZONA RURAL</b><h3 style='color:#2ca02c;'>{zonas['rural']:.2f}%</h3></div></div>"
+        )
+    for titulo_secao, graficos, com_cartoes in SECOES:
+        conteudo = "".join(_html_grafico(chart_id, subtitulo, aviso, pacote) for chart_id, subtitulo, aviso in graficos)
+        if com_cartoes:
+            cartoes = "".join(indicador_card_html(rotulo, pacote["inst_cards"][sub]) for rotulo, sub in INDICADOR_CARDS)
+            conteudo = f"<div style='flex: 3'>{conteudo}</div><div>{cartoes}</div>"
+        partes.append(f"<hr><h2>{html.escape(titulo_secao)}</h2><div class='linha'>{conteudo}</div>")
+
+    script = f"""
+const configuracao = {{responsive: true}};
+fetch("{arquivos['mapa']}").then(r => r.json()).then(f => Plotly.newPlot("mapa", f.data, f.layout, configuracao));
+fetch("{arquivos['pacote']}").then(r => r.json()).then(pacote => {{
+    for (const [id, figura] of Object.entries(pacote.figuras)) {{
+        if (figura && document.getElementById(id)) Plotly.newPlot(id, figura.data, figura.layout, configuracao);
+    }}
+}});"""
+    return f"""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Resumo Caparaó · {html.escape(visao)}</title>
+<style>{ESTILO}</style>
+<script src="../assets/{plotly_js}"></script>
+</head>
+<body>
+{''.join(partes)}
+<script>{script}</script>
+</body>
+</html>
+"""
+
+
+# --- Exportação ---
+
+def export_region(regiao, carga, saida, plotly_js):
+    """Grava as páginas, os pacotes e os arquivos compartilhados de uma região. Retorna {arquivo: bytes}."""
+    pasta = os.path.join(saida, slugify(regiao))
+    os.makedirs(pasta, exist_ok=True)
+    gravados = {}
+
+    geo = f"geo-{carga.versao}.json"
+    mapa = f"mapa-{carga.versao}.json"
+    gravados[geo] = _gravar(os.path.join(pasta, geo), dumps_compact(carga.dados['geojson']))
+    gravados[mapa] = _gravar(os.path.join(pasta, mapa), json.dumps(map_figure_json(carga, geo), separators=(",", ":")))
+
+    visoes = list(carga.cubo)
+    for visao in visoes:
+        pacote = view_bundle(carga, visao)
+        arquivo_pacote = f"visao-{slugify(visao)}-{carga.versao}.json"
+        gravados[arquivo_pacote] = _gravar(os.path.join(pasta, arquivo_pacote), json.dumps(pacote, ensure_ascii=False, separators=(",", ":")))
+        pagina = render_page(regiao, visoes, visao, pacote, {'mapa': mapa, 'pacote': arquivo_pacote}, plotly_js)
+        gravados[_pagina(visao)] = _gravar(os.path.join(pasta, _pagina(visao)), pagina)
+
+    _remover_obsoletos(pasta, gravados)
+    return gravados
+
+
+def _remover_obsoletos(pasta, gravados):
+    """Remove pacotes de versões anteriores e páginas de visões que não existem mais (o que esta exportação não gravou)."""
+    for nome in os.listdir(pasta):
+        if nome.endswith((".json", ".html")) and nome not in gravados:
+            os.remove(os.path.join(pasta, nome))
+
+
+def export(saida="dist", regioes=None):
+    """Exporta as regiões (todas, por padrão) para a pasta `saida`. Retorna {região: {arquivo: bytes}}."""
+    registro = RegionRegistry(observar=False)
+    regioes = regioes or registro.names()
+
+    os.makedirs(os.path.join(saida, "assets"), exist_ok=True)
+    plotly_js = f"plotly-{plotly.__version__}.min.js"
+    caminho_js = os.path.join(saida, "assets", plotly_js)
+    if not os.path.exists(caminho_js):
+        _gravar(caminho_js, get_plotlyjs())
+
+    resultado = {}
+    for regiao in regioes:
+        # Uma região por vez: o registro descarta as anteriores se passar do orçamento de memória
+        resultado[regiao] = export_region(regiao, registro.current(regiao), saida, plotly_js)
+
+    # Lista também as regiões exportadas em execuções anteriores
+    exportadas = [r for r in registro.names() if os.path.isdir(os.path.join(saida, slugify(r)))]
+    links = "".join(f"<li><a href='{slugify(r)}/index.html'>{html.escape(r)}</a></li>" for r in exportadas)
+    _gravar(os.path.join(saida, "index.html"),
+            f"<!DOCTYPE html><html lang='pt-BR'><head><meta charset='utf-8'><title>Resumo Caparaó</title></head>"
+            f"<body><h1>Dashboard Gênesis Caparaó</h1><ul>{links}</ul></body></html>\n")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta todas as visões do dashboard como páginas estáticas.")
+    parser.add_argument("--saida", default="dist")
+    parser.add_argument("--regiao", action="append", help="região a exportar (pode repetir); padrão: todas")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resultado = export(args.saida, args.regiao)
+    for regiao, arquivos in resultado.items():
+        print(f"{regiao}: {len(arquivos)} arquivos, {sum(arquivos.values()) / 1024:.0f} KB")
+    print(f"Exportado em {args.saida} ({time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# synthetic_data.py
+
+"""
+Gerador de dados sintéticos no mesmo formato das fontes do dashboard.
+
+Cria um cidades.csv (com números no formato brasileiro, como o original),
+um base_de_dados.xlsx com as abas e colunas definidas no config.py e um
+GeoJSON com um polígono por município. O número de municípios e o fator de
+linhas por município são configuráveis, para medir como o app escala
+(ver benchmark.py).
+
+Uso:
+    python synthetic_data.py saida/ --municipios 120 --fator-linhas 10
+    python synthetic_data.py "regioes/Teste" --municipios 80   # região extra no app (ver regions.py)
+"""
+
+import argparse
+import json
+import os
+import random
+
+import pandas as pd
+
+from config import *
+from data_snapshot import XLSX_SHEETS
+
+SETORES = ["AGRICULTURA", "INDÚSTRIA", "COMÉRCIO", "ADMINISTRAÇÃO PÚBLICA", "SERVIÇOS"]
+FAIXAS_ETARIAS = ["15-17", "18-24", "25-29", "30-39", "40-49", "50-64", "65-mais"]
+PORTES = ["MEI", "ME", "EPP", "OUTRAS"]
+REDES = ["Municipal", "Estadual", "Particular", "Federal"]
+NIVEIS = ["Infantil", "Fundamental", "Médio", "Técnico", "Superior"]
+ETAPAS = ["Anos Iniciais", "Anos Finais", "Ensino Médio"]
+CATEGORIAS = {
+    "Educação": ["Infantil", "Fundamental", "Médio", "Superior"],
+    "Governo": ["Prefeitura", "Secretaria"],
+    "Economia": ["Comércio", "Indústria", "Serviços"],
+    "Empreendedorismo": ["Aceleradora", "Coworking", "Incubadora"],
+}
+
+# Linhas por município com fator 1 (próximo do volume das fontes reais)
+INSTITUICOES_ENSINO_POR_MUNICIPIO = 25
+INSTITUICOES_POR_MUNICIPIO = 60
+
+
+def _br(valor, casas=0):
+    """Formata um número no padrão brasileiro (1.234,56)."""
+    texto = f"{valor:,.{casas}f}"
+    return texto.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _nomes_municipios(n):
+    return [f"Município {i:04d}" for i in range(1, n + 1)]
+
+
+def _codigo_ibge(i):
+    """Código IBGE fictício do i-ésimo município (o mesmo no cidades.csv e no GeoJSON)."""
+    return f"{3200000 + i}"
+
+
+def build_cidades(municipios, rng):
+    linhas = []
+    for i, nome in enumerate(municipios):
+        habitantes = rng.randint(4_000, 40_000)
+        linhas.append({
+            CIDADES_MUNICIPIO_COL: nome,
+            HABITANTES_COL: _br(habitantes),
+            POP_ATIVA_COL: _br(int(habitantes * rng.uniform(0.55, 0.7))),
+            POP_OCUPADA_COL: f"{_br(rng.uniform(10, 25), 2)}%",
+            POP_ESTIMADA_COL: _br(int(habitantes * rng.uniform(1.02, 1.1))),
+            IDH_COL: _br(rng.uniform(0.6, 0.76), 3),
+            RENDA_PER_CAPITA_SM_COL: _br(rng.choice([1.6, 1.7, 1.8, 1.9, 2.0]), 1),
+            PIB_PER_CAPITA_COL: f"R$ {_br(rng.uniform(13_000, 25_000), 2)}",
+            CD_MUN_COL: _codigo_ibge(i),
+        })
+    return pd.DataFrame(linhas)
+
+
+def build_sheets(municipios, fator, rng):
+    """Abas do xlsx no formato longo esperado pelo config.py; `fator` multiplica as linhas."""
+    geo, setor, faixa, empresas, ensino, ideb, instituicoes = ([] for _ in range(7))
+    for nome in municipios:
+        urbana = rng.uniform(30, 95)
+        geo += [{MUNICIPIO_COL: nome, ZONA_COL: "Urbana", PERCENTUAL_COL: urbana},
+                {MUNICIPIO_COL: nome, ZONA_COL: "Rural", PERCENTUAL_COL: 100 - urbana}]
+        for _ in range(fator):
+            setor += [{MUNICIPIO_COL: nome, SETOR_COL: s, EMPREGADOS_SETOR_VAL_COL: rng.randint(20, 2_000)} for s in SETORES]
+            faixa += [{MUNICIPIO_COL: nome, FAIXA_ETARIA_COL: f, EMPREGADOS_FAIXA_ETARIA_VAL_COL: rng.randint(0, 800)} for f in FAIXAS_ETARIAS]
+            empresas += [{MUNICIPIO_COL: nome, PORTE_EMPRESA_COL: p, EMPRESAS_QTD_COL: rng.randint(5, 900)} for p in PORTES]
+            ideb += [{MUNICIPIO_COL: nome, ETAPA_ENSINO_COL: e, IDEB_VAL_COL: round(rng.uniform(3.5, 7), 1)} for e in ETAPAS]
+        for _ in range(INSTITUICOES_ENSINO_POR_MUNICIPIO * fator):
+            ensino.append({MUNICIPIO_COL: nome, REDE_ENSINO_COL: rng.choice(REDES), NIVEL_ENSINO_COL: rng.choice(NIVEIS)})
+        for _ in range(INSTITUICOES_POR_MUNICIPIO * fator):
+            categoria = rng.choice(list(CATEGORIAS))
+            instituicoes.append({MUNICIPIO_COL: nome, CATEGORIA_INST_COL: categoria, SUBCATEGORIA_INST_COL: rng.choice(CATEGORIAS[categoria])})
+
+    return {
+        'geo_dados': pd.DataFrame(geo),
+        'empregos_setor': pd.DataFrame(setor),
+        'empregos_faixa_etaria': pd.DataFrame(faixa),
+        'empresas': pd.DataFrame(empresas),
+        'instituicoes_ensino': pd.DataFrame(ensino),
+        'ideb': pd.DataFrame(ideb),
+        'instituicoes': pd.DataFrame(instituicoes),
+    }
+
+
+def build_geojson(municipios, pontos_por_lado=100):
+    """Grade de quadrados de 0,1° com os lados subdivididos (para exercitar a simplificação)."""
+    colunas = max(1, int(len(municipios) ** 0.5))
+    features = []
+    for i, nome in enumerate(municipios):
+        x0, y0 = -42.0 + 0.1 * (i % colunas), -21.0 + 0.1 * (i // colunas)
+        cantos = [(x0, y0), (x0 + 0.1, y0), (x0 + 0.1, y0 + 0.1), (x0, y0 + 0.1), (x0, y0)]
+        anel = []
+        for (xa, ya), (xb, yb) in zip(cantos, cantos[1:]):
+            anel += [[round(xa + (xb - xa) * k / pontos_por_lado, 7), round(ya + (yb - ya) * k / pontos_por_lado, 7)]
+                     for k in range(pontos_por_lado)]
+        anel.append(anel[0])
+        features.append({
+            "type": "Feature",
+            "properties": {"CD_MUN": _codigo_ibge(i), "NM_MUN": nome},
+            "geometry": {"type": "Polygon", "coordinates": [anel]},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def generate(pasta, municipios=12, fator_linhas=1, semente=0):
+    """Grava cidades.csv, base_de_dados.xlsx e o GeoJSON sintéticos em `pasta`."""
+    rng = random.Random(semente)
+    nomes = _nomes_municipios(municipios)
+    os.makedirs(pasta, exist_ok=True)
+
+    build_cidades(nomes, rng).to_csv(os.path.join(pasta, CIDADES_FILE), index=False)
+    with pd.ExcelWriter(os.path.join(pasta, BASE_DE_DADOS_XLSX_FILE)) as writer:
+        for chave, df in build_sheets(nomes, fator_linhas, rng).items():
+            df.to_excel(writer, sheet_name=XLSX_SHEETS[chave], index=False)
+    with open(os.path.join(pasta, GEOJSON_FILE), "w", encoding="utf-8") as f:
+        json.dump(build_geojson(nomes), f, ensure_ascii=False)
+    return pasta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera fontes de dados sintéticas para testes de escala.")
+    parser.add_argument("pasta")
+    parser.add_argument("--municipios", type=int, default=12)
+    parser.add_argument("--fator-linhas", type=int, default=1, help="multiplica as linhas por município de cada aba")
+    parser.add_argument("--semente", type=int, default=0)
+    args = parser.parse_args()
+    generate(args.pasta, args.municipios, args.fator_linhas, args.semente)
+    print(f"Dados sintéticos gravados em {args.pasta}")
+
+
+if __name__ == "__main__":
+    main()